@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import io
+import sys
+import time
+import tarfile
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from slipit import TarProvider
+
+
+parser = argparse.ArgumentParser(description='''Compare per entry tar header encoding against the bulk encoder.''')
+parser.add_argument('--entries', metavar='int', type=int, default=100000, help='number of entries to write (default=100000)')
+parser.add_argument('--depth', metavar='int', type=int, default=40, help='maximum traversal depth of entry names (default=40)')
+parser.add_argument('--content', metavar='string', default='Hello World :D', help='content of each entry')
+parser.add_argument('--symlink', action='store_true', help='write symlinks instead of files')
+
+
+def traversal_names(entries: int, depth: int) -> [str]:
+    '''
+    Create traversal entry names with increasing depth. Deep names exceed the
+    ustar name field and require pax extended headers.
+
+    Parameters:
+        entries     number of names to create
+        depth       maximum traversal depth
+
+    Returns:
+        list of entry names
+    '''
+    return ['..\\' * (ctr % depth + 1) + f'file-{ctr}' for ctr in range(entries)]
+
+
+def per_entry(provider: TarProvider, args, names: [str]) -> None:
+    '''
+    Write all entries by using the per entry methods.
+
+    Parameters:
+        provider    TarProvider to write to
+        args        argparse namespace for the command line
+        names       entry names to write
+
+    Returns:
+        None
+    '''
+    for name in names:
+
+        if args.symlink:
+            provider.append_symlink(args.content, name)
+
+        else:
+            provider.append_blob(args.content.encode('utf-8'), name)
+
+
+def bulk(provider: TarProvider, args, names: [str]) -> None:
+    '''
+    Write all entries by using the bulk methods.
+
+    Parameters:
+        provider    TarProvider to write to
+        args        argparse namespace for the command line
+        names       entry names to write
+
+    Returns:
+        None
+    '''
+    if args.symlink:
+        provider.append_symlinks(args.content, names)
+
+    else:
+        provider.append_blobs(args.content.encode('utf-8'), names)
+
+
+def run(method, args, names: [str]) -> (bytes, float):
+    '''
+    Write all entries into an in memory archive by using the specified method.
+
+    Parameters:
+        method      function that writes the entries
+        args        argparse namespace for the command line
+        names       entry names to write
+
+    Returns:
+        tuple of the archive content and the elapsed time
+    '''
+    output = io.BytesIO()
+    provider = TarProvider(tarfile.open(fileobj=output, mode='w'))
+
+    start = time.perf_counter()
+    method(provider, args, names)
+    provider.close_archive()
+    elapsed = time.perf_counter() - start
+
+    return output.getvalue(), elapsed
+
+
+def main():
+    '''
+    Main method :)
+    '''
+    args = parser.parse_args()
+    names = traversal_names(args.entries, args.depth)
+
+    reference, reference_time = run(per_entry, args, names)
+    content, content_time = run(bulk, args, names)
+
+    print(f'[+] Entries:               {args.entries:>12}')
+    print(f'[+] Archive size:          {len(content):>12} bytes')
+    print(f'[+] Per entry (tarfile):   {args.entries / reference_time:>12.0f} entries/s')
+    print(f'[+] Bulk encoder:          {args.entries / content_time:>12.0f} entries/s')
+    print(f'[+] Speedup:               {reference_time / content_time:>12.1f}x')
+
+    if content != reference:
+        print('[-] Archive content differs from the tarfile output.')
+        sys.exit(1)
+
+    print('[+] Archive content is identical to the tarfile output.')
+
+
+main()
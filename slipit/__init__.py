@@ -1,4 +1,5 @@
 from .archive_provider import ArchiveProvider
+from .archive_session import ArchiveSession
 from .provider.tar_provider import TarProvider
 from .provider.zip_provider import ZipProvider
 from .provider.compressed_tar_provider import GZipProvider, BZip2Provider
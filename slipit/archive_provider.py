@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from slipit.content import Content
+
 
 class ArchiveProvider:
     '''
@@ -97,6 +99,35 @@ class ArchiveProvider:
         for name in archived_names:
             self.append_blob(blob, name)
 
+    def append_content(self, content: Content, archived_name: str) -> None:
+        '''
+        Append generated content to the archive. The content is streamed
+        into the archive chunk by chunk.
+
+        Parameters:
+            content         Content object to append to the archive
+            archived_name   file name within the archive
+
+        Returns:
+            None
+        '''
+        raise NotImplementedError
+
+    def append_contents(self, content: Content, archived_names: [str]) -> None:
+        '''
+        Append generated content to the archive under multiple different
+        archive names.
+
+        Parameters:
+            content         Content object to append to the archive
+            archived_names  list of file names within the archive
+
+        Returns:
+            None
+        '''
+        for name in archived_names:
+            self.append_content(content, name)
+
     def append_symlink(self, target: str, archived_name: str) -> None:
         '''
         Append a symlink to the archive.
@@ -149,6 +180,48 @@ class ArchiveProvider:
         '''
         raise NotImplementedError
 
+    def build_variants(name: str, variants: dict) -> None:
+        '''
+        Create several copies of an existing archive, each with different
+        data blobs appended.
+
+        Parameters:
+            name            file system path of the base archive
+            variants        dictionary mapping output paths to lists of
+                            (blob, archived_name) tuples
+
+        Returns:
+            None
+        '''
+        raise NotImplementedError
+
+    def iter_entries(name: str):
+        '''
+        Yield the names of all archive members together with their link targets.
+        Only archive headers are parsed and member contents are not decompressed.
+
+        Parameters:
+            name            file system path to the archive
+
+        Returns:
+            generator of (archived_name, link_target, link_type) tuples. link_type
+            is 'symlink', 'hardlink' or None for members that are no links.
+        '''
+        raise NotImplementedError
+
+    def list_indexed(name: str) -> None:
+        '''
+        Print a list of files contained within the archive by using an index
+        that is stored next to the archive.
+
+        Parameters:
+            name            file system path to the archive
+
+        Returns:
+            None
+        '''
+        raise NotImplementedError
+
     def clear_archive(name: str, payload: str) -> None:
         '''
         Clear the specified archive from path traversal sequences.
@@ -162,6 +235,23 @@ class ArchiveProvider:
         '''
         raise NotImplementedError
 
+    def copy_archive(name: str, output: ArchiveProvider, resolve) -> None:
+        '''
+        Copy the members of an existing archive into another archive. Each member
+        is streamed from the source to the output archive. The resolve callable
+        is invoked with the name of each member and returns the name the member
+        should be stored under, or None if the member should be dropped.
+
+        Parameters:
+            name            file system path of the source archive
+            output          ArchiveProvider to copy the members into
+            resolve         callable mapping member names to output names
+
+        Returns:
+            None
+        '''
+        raise NotImplementedError
+
     def close_archive(self) -> None:
         '''
         Close the archive.
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import os
+import fnmatch
+import tempfile
+from pathlib import Path
+from slipit.content import Content
+from slipit.archive_provider import ArchiveProvider
+
+
+class ArchiveSession:
+    '''
+    Collects modifications for an archive and applies all of them within
+    a single rewrite. Appends, removals, renames and clear operations are
+    queued in the order they are requested. On commit, the existing archive
+    is streamed once into a temporary file next to it, queued appends are
+    added afterwards and the temporary file atomically replaces the archive.
+
+    Removals, renames and clear operations apply to all members that exist
+    at the time they are queued. This includes existing archive members as
+    well as files that were appended earlier within the same session.
+    '''
+
+    def __init__(self, name: str, provider: ArchiveProvider, overwrite: bool = False) -> None:
+        '''
+        Initialize the session for the specified archive.
+
+        Parameters:
+            name            file system path of the archive
+            provider        ArchiveProvider responsible for the archive
+            overwrite       discard the existing archive content on commit
+
+        Returns:
+            None
+        '''
+        self.name = name
+        self.provider = provider
+        self.overwrite = overwrite
+        self.operations = []
+
+    def __enter__(self) -> ArchiveSession:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+
+    def append_file(self, filename: str, archived_name: str) -> None:
+        '''
+        Queue an already existing file for being added to the archive.
+
+        Parameters:
+            filename        file that is added to the archive
+            archived_name   filename within the archive
+
+        Returns:
+            None
+        '''
+        self.operations.append(('append_file', filename, archived_name))
+
+    def append_files(self, filename: str, archived_names: [str]) -> None:
+        '''
+        Queue an already existing file for being added to the archive under
+        different archive names.
+
+        Parameters:
+            filename        file that is added to the archive
+            archived_names  list of file names within the archive
+
+        Returns:
+            None
+        '''
+        for name in archived_names:
+            self.append_file(filename, name)
+
+    def append_blob(self, blob: bytes, archived_name: str) -> None:
+        '''
+        Queue a data blob for being added to the archive.
+
+        Parameters:
+            blob            blob of bytes to append to the archive
+            archived_name   file name within the archive
+
+        Returns:
+            None
+        '''
+        self.operations.append(('append_blob', blob, archived_name))
+
+    def append_blobs(self, blob: bytes, archived_names: [str]) -> None:
+        '''
+        Queue a data blob for being added to the archive under multiple
+        different archive names.
+
+        Parameters:
+            blob            blob of bytes to append to the archive
+            archived_names  list of file names within the archvie
+
+        Returns:
+            None
+        '''
+        for name in archived_names:
+            self.append_blob(blob, name)
+
+    def append_content(self, content: Content, archived_name: str) -> None:
+        '''
+        Queue generated content for being added to the archive.
+
+        Parameters:
+            content         Content object to append to the archive
+            archived_name   file name within the archive
+
+        Returns:
+            None
+        '''
+        self.operations.append(('append_content', content, archived_name))
+
+    def append_contents(self, content: Content, archived_names: [str]) -> None:
+        '''
+        Queue generated content for being added to the archive under multiple
+        different archive names.
+
+        Parameters:
+            content         Content object to append to the archive
+            archived_names  list of file names within the archive
+
+        Returns:
+            None
+        '''
+        for name in archived_names:
+            self.append_content(content, name)
+
+    def append_symlink(self, target: str, archived_name: str) -> None:
+        '''
+        Queue a symlink for being added to the archive.
+
+        Parameters:
+            target          symlink target
+            archived_name   file name within the archive
+
+        Returns:
+            None
+        '''
+        self.operations.append(('append_symlink', target, archived_name))
+
+    def append_symlinks(self, target: str, archived_names: [str]) -> None:
+        '''
+        Queue a symlink for being added to the archive under several different
+        archive names.
+
+        Parameters:
+            target          symlink target
+            archived_names  list of file names within the archvie
+
+        Returns:
+            None
+        '''
+        for name in archived_names:
+            self.append_symlink(target, name)
+
+    def remove_files(self, archived_name: str) -> None:
+        '''
+        Queue the removal of all files matching the specified filename
+        (glob matching).
+
+        Parameters:
+            archived_name   filename to match files against
+
+        Returns:
+            None
+        '''
+        self.operations.append(('remove', archived_name))
+
+    def clear_archive(self, payload: str) -> None:
+        '''
+        Queue the removal of all files containing the specified path
+        traversal payload.
+
+        Parameters:
+            payload         path traversal payload to look for
+
+        Returns:
+            None
+        '''
+        self.operations.append(('clear', payload))
+
+    def rename_file(self, archived_name: str, new_name: str) -> None:
+        '''
+        Queue renaming the file with the specified name.
+
+        Parameters:
+            archived_name   current filename within the archive
+            new_name        new filename within the archive
+
+        Returns:
+            None
+        '''
+        self.operations.append(('rename', archived_name, new_name))
+
+    def resolve(self, archived_name: str, start: int = 0) -> str:
+        '''
+        Apply the queued removal, rename and clear operations, beginning at the
+        specified operation index, to a filename.
+
+        Parameters:
+            archived_name   filename within the archive
+            start           index of the first operation to apply
+
+        Returns:
+            filename after all operations were applied or None if removed
+        '''
+        for operation in self.operations[start:]:
+
+            action = operation[0]
+
+            if action == 'remove' and fnmatch.fnmatch(archived_name, operation[1]):
+                return None
+
+            elif action == 'clear' and operation[1] in archived_name:
+                return None
+
+            elif action == 'rename' and archived_name == operation[1]:
+                archived_name = operation[2]
+
+        return archived_name
+
+    def appends(self):
+        '''
+        Yield the queued append operations with their resolved filenames.
+        Consecutive appends of the same source are grouped, which allows
+        providers to add them in bulk.
+
+        Parameters:
+            None
+
+        Returns:
+            generator of (action, source, archived_names) tuples
+        '''
+        group = None
+
+        for index, operation in enumerate(self.operations):
+
+            action = operation[0]
+
+            if not action.startswith('append'):
+                continue
+
+            archived_name = self.resolve(operation[2], index + 1)
+
+            if archived_name is None:
+                continue
+
+            if group and group[0] == action and group[1] is operation[1]:
+                group[2].append(archived_name)
+                continue
+
+            if group:
+                yield group
+
+            group = (action, operation[1], [archived_name])
+
+        if group:
+            yield group
+
+    def commit(self) -> None:
+        '''
+        Apply all queued operations within a single read of the existing archive
+        and a single write of the new one. The archive is replaced atomically,
+        so that an error leaves the original archive untouched.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        path = Path(self.name)
+        existing = path.is_file() and not self.overwrite
+
+        if not path.is_file() and not self.overwrite:
+
+            if any(not operation[0].startswith('append') for operation in self.operations):
+                raise FileNotFoundError(self.name)
+
+        fd, tmp = tempfile.mkstemp(prefix=f'.{path.name}.', dir=path.absolute().parent)
+        os.close(fd)
+
+        try:
+            output = self.provider.create(tmp)
+
+            try:
+                if existing:
+                    self.provider.copy_archive(self.name, output, self.resolve)
+
+                for action, source, archived_names in self.appends():
+                    getattr(output, action + 's')(source, archived_names)
+
+            finally:
+                output.close_archive()
+
+            if path.is_file():
+                os.chmod(tmp, path.stat().st_mode)
+
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp, 0o666 & ~umask)
+
+            os.replace(tmp, self.name)
+
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        self.operations = []
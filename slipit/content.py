@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import re
+import random
+
+
+CHUNK_SIZE = 1024 * 1024
+SIZE_PATTERN = re.compile(r'^(\d+)([KMGT]?)$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+class Content:
+    '''
+    Base class for synthetic payload content. Content objects declare their
+    size in advance and produce their data lazily as a sequence of chunks.
+    Providers stream these chunks into archive entries, which keeps the memory
+    usage at the chunk size independent of the payload size.
+
+    Content that contains zero regions can be marked as sparse. Providers that
+    support sparse entries only store the data regions in this case.
+    '''
+
+    def __init__(self, size: int, sparse: bool = False) -> None:
+        '''
+        Initialize the content with its declared size.
+
+        Parameters:
+            size            number of bytes the content consists of
+            sparse          store zero regions as holes if supported
+
+        Returns:
+            None
+        '''
+        if size < 0:
+            raise ValueError(f'Content size must not be negative: {size}')
+
+        self.size = size
+        self.sparse = sparse
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE):
+        '''
+        Yield the content as a sequence of bytes like objects.
+
+        Parameters:
+            chunk_size      maximum size of the yielded chunks
+
+        Returns:
+            generator of bytes like objects
+        '''
+        raise NotImplementedError
+
+    def data_regions(self) -> [(int, int)]:
+        '''
+        Return the regions of the content that are not known to be zero.
+
+        Parameters:
+            None
+
+        Returns:
+            list of (offset, length) tuples
+        '''
+        return [(0, self.size)] if self.size else []
+
+    def data_chunks(self, chunk_size: int = CHUNK_SIZE, regions: [(int, int)] = None):
+        '''
+        Yield only the data regions of the content as a sequence of bytes like
+        objects. Zero regions are skipped.
+
+        Parameters:
+            chunk_size      maximum size of the yielded chunks
+            regions         regions to yield (default: data_regions())
+
+        Returns:
+            generator of bytes like objects
+        '''
+        regions = self.data_regions() if regions is None else regions
+        offset = 0
+
+        if not regions:
+            return
+
+        for chunk in self.chunks(chunk_size):
+
+            end = offset + len(chunk)
+
+            for start, length in regions:
+
+                lower = max(start, offset)
+                upper = min(start + length, end)
+
+                if lower < upper:
+                    yield memoryview(chunk)[lower - offset:upper - offset]
+
+            offset = end
+
+
+class ZeroContent(Content):
+    '''
+    Content consisting of zero bytes only.
+    '''
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE):
+        '''
+        Yield the content as a sequence of zero filled chunks.
+
+        Parameters:
+            chunk_size      maximum size of the yielded chunks
+
+        Returns:
+            generator of bytes like objects
+        '''
+        zeros = memoryview(bytes(min(chunk_size, self.size)))
+
+        for offset in range(0, self.size, chunk_size):
+            yield zeros[:min(chunk_size, self.size - offset)]
+
+    def data_regions(self) -> [(int, int)]:
+        '''
+        Return the regions of the content that are not known to be zero.
+
+        Parameters:
+            None
+
+        Returns:
+            empty list
+        '''
+        return []
+
+
+class PatternContent(Content):
+    '''
+    Content consisting of a repeated byte pattern.
+    '''
+
+    def __init__(self, pattern: bytes, size: int, sparse: bool = False) -> None:
+        '''
+        Initialize the content with the pattern to repeat.
+
+        Parameters:
+            pattern         bytes to repeat
+            size            number of bytes the content consists of
+            sparse          store zero regions as holes if supported
+
+        Returns:
+            None
+        '''
+        if not pattern:
+            raise ValueError('Content pattern must not be empty.')
+
+        super().__init__(size, sparse)
+        self.pattern = pattern
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE):
+        '''
+        Yield the content as a sequence of chunks containing the pattern.
+
+        Parameters:
+            chunk_size      maximum size of the yielded chunks
+
+        Returns:
+            generator of bytes like objects
+        '''
+        length = len(self.pattern)
+        repeated = memoryview(self.pattern * (min(chunk_size, self.size) // length + 2))
+
+        for offset in range(0, self.size, chunk_size):
+
+            start = offset % length
+            yield repeated[start:start + min(chunk_size, self.size - offset)]
+
+
+class RandomContent(Content):
+    '''
+    Content consisting of pseudo random bytes. The same seed always produces
+    the same content.
+    '''
+
+    def __init__(self, size: int, seed: int = 0, sparse: bool = False) -> None:
+        '''
+        Initialize the content with the seed to use.
+
+        Parameters:
+            size            number of bytes the content consists of
+            seed            seed for the random number generator
+            sparse          store zero regions as holes if supported
+
+        Returns:
+            None
+        '''
+        super().__init__(size, sparse)
+        self.seed = seed
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE):
+        '''
+        Yield the content as a sequence of random chunks.
+
+        Parameters:
+            chunk_size      maximum size of the yielded chunks
+
+        Returns:
+            generator of bytes like objects
+        '''
+        generator = random.Random(self.seed)
+
+        for offset in range(0, self.size, chunk_size):
+            yield generator.randbytes(min(chunk_size, self.size - offset))
+
+
+class IterContent(Content):
+    '''
+    Content produced by an arbitrary iterable of bytes like objects. The
+    chunks are passed through as they are. If the iterable is an iterator,
+    the content can only be consumed once.
+    '''
+
+    def __init__(self, iterable, size: int, sparse: bool = False) -> None:
+        '''
+        Initialize the content with the iterable to consume.
+
+        Parameters:
+            iterable        iterable of bytes like objects
+            size            number of bytes the iterable produces
+            sparse          store zero regions as holes if supported
+
+        Returns:
+            None
+        '''
+        super().__init__(size, sparse)
+        self.iterable = iterable
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE):
+        '''
+        Yield the chunks of the underlying iterable. An error is raised if the
+        iterable does not produce the declared number of bytes.
+
+        Parameters:
+            chunk_size      ignored
+
+        Returns:
+            generator of bytes like objects
+        '''
+        produced = 0
+
+        for chunk in self.iterable:
+
+            produced += len(chunk)
+
+            if produced > self.size:
+                break
+
+            yield chunk
+
+        if produced != self.size:
+            raise ValueError(f'Content iterable produced {produced} bytes, but {self.size} were declared.')
+
+
+class ConcatContent(Content):
+    '''
+    Content consisting of several other contents placed after each other.
+    Zero regions of the parts are preserved.
+    '''
+
+    def __init__(self, parts: [Content], sparse: bool = False) -> None:
+        '''
+        Initialize the content with the parts to concatenate.
+
+        Parameters:
+            parts           list of Content objects
+            sparse          store zero regions as holes if supported
+
+        Returns:
+            None
+        '''
+        super().__init__(sum(part.size for part in parts), sparse)
+        self.parts = parts
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE):
+        '''
+        Yield the chunks of all parts.
+
+        Parameters:
+            chunk_size      maximum size of the yielded chunks
+
+        Returns:
+            generator of bytes like objects
+        '''
+        for part in self.parts:
+            yield from part.chunks(chunk_size)
+
+    def data_regions(self) -> [(int, int)]:
+        '''
+        Return the regions of the content that are not known to be zero.
+        Adjacent regions of different parts are merged.
+
+        Parameters:
+            None
+
+        Returns:
+            list of (offset, length) tuples
+        '''
+        regions = []
+        offset = 0
+
+        for part in self.parts:
+
+            for start, length in part.data_regions():
+
+                start += offset
+
+                if regions and sum(regions[-1]) == start:
+                    regions[-1] = (regions[-1][0], regions[-1][1] + length)
+
+                else:
+                    regions.append((start, length))
+
+            offset += part.size
+
+        return regions
+
+
+def parse_size(size: str) -> int:
+    '''
+    Parse a size specification like 512, 64K, 10M or 2G (binary units).
+
+    Parameters:
+        size            size specification
+
+    Returns:
+        size in bytes
+    '''
+    match = SIZE_PATTERN.match(size.strip())
+
+    if match is None:
+        raise ValueError(f'Invalid size specification: {size}')
+
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).upper()]
+
+
+def parse_spec(spec: str) -> Content:
+    '''
+    Parse a content specification. Supported specifications are:
+
+        zero:<size>                 zero bytes
+        pattern:<size>:<text>       repeated text
+        random:<size>[:<seed>]      pseudo random bytes (default seed is 0)
+
+    Several specifications can be concatenated using a '+' character, which
+    can therefore not be used within pattern text.
+
+    Parameters:
+        spec            content specification
+
+    Returns:
+        Content object for the specification
+    '''
+    parts = []
+
+    for part in spec.split('+'):
+
+        kind, _, rest = part.partition(':')
+        size, _, arg = rest.partition(':')
+
+        if kind == 'zero' and not arg:
+            parts.append(ZeroContent(parse_size(size)))
+
+        elif kind == 'pattern' and arg:
+            parts.append(PatternContent(arg.encode('utf-8'), parse_size(size)))
+
+        elif kind == 'random' and (not arg or arg.isdigit()):
+            parts.append(RandomContent(parse_size(size), int(arg or 0)))
+
+        else:
+            raise ValueError(f'Invalid content specification: {part}')
+
+    return parts[0] if len(parts) == 1 else ConcatContent(parts)
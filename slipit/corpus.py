@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import itertools
+from pathlib import Path
+from slipit.content import parse_spec
+from slipit.traversal import get_traversals
+from slipit.archive_provider import ArchiveProvider
+
+
+MATRIX_KEYS = ['type', 'depth', 'separator', 'sequence', 'prefix', 'increment', 'multi']
+CONTENT_KEYS = ['static', 'generate', 'symlink']
+DEFAULTS = {'type': 'zip', 'depth': 6, 'separator': '\\', 'sequence': None, 'prefix': '', 'increment': None, 'multi': False}
+EXTENSIONS = {'zip': '.zip', 'tar': '.tar', 'tgz': '.tar.gz', 'bz2': '.tar.bz2'}
+PROVIDER_EXTENSIONS = {'zip': '.zip', 'tar': '.tar', 'tgz': '.tgz', 'bz2': '.bz2'}
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class Corpus:
+    '''
+    Generates a corpus of traversal archives from a JSON specification. Each
+    traversal option within the specification accepts a single value or a list
+    of values and one archive is created for each combination of them:
+
+        {
+            "files": ["passwd", "shell.php"],
+            "static": "Hello World",
+            "type": ["zip", "tar"],
+            "depth": [1, 6, 12],
+            "separator": ["\\\\", "/"]
+        }
+
+    Supported options are type, depth, separator, sequence, prefix, increment
+    and multi. The content of the archived files is taken from the static,
+    generate (optionally together with sparse) or symlink keys. If none of them
+    is present, the files are read from the file system relative to the
+    specification.
+
+    The corpus can be split into shards that are generated independently.
+    Completed outputs are recorded within a journal, so that an interrupted
+    run skips all outputs that were already created and still match their
+    recorded checksum. Each shard finally writes a manifest with checksums.
+    '''
+
+    def __init__(self, spec: dict, output: str, base: str = '.') -> None:
+        '''
+        Initialize the corpus for the specified specification.
+
+        Parameters:
+            spec            corpus specification
+            output          output directory for the corpus
+            base            directory file paths are resolved relative to
+
+        Returns:
+            None
+        '''
+        self.spec = spec
+        self.output = Path(output)
+        self.base = Path(base)
+
+        unknown = set(spec) - set(MATRIX_KEYS) - set(CONTENT_KEYS) - {'files', 'sparse'}
+
+        if unknown:
+            raise ValueError(f'Unknown corpus specification keys: {", ".join(sorted(unknown))}')
+
+        if len([key for key in CONTENT_KEYS if spec.get(key) is not None]) > 1:
+            raise ValueError(f'Only one of {", ".join(CONTENT_KEYS)} can be used within a corpus specification.')
+
+        if spec.get('sparse') and spec.get('generate') is None:
+            raise ValueError('The sparse key can only be used together with the generate key.')
+
+        if not spec.get('files'):
+            raise ValueError('Corpus specification does not contain any files.')
+
+        for archive_type in Corpus.values(spec, 'type'):
+
+            if archive_type not in EXTENSIONS:
+                raise ValueError(f'Unsupported archive type within corpus specification: {archive_type}')
+
+    def open(name: str, output: str) -> Corpus:
+        '''
+        Load a corpus specification from a JSON file.
+
+        Parameters:
+            name            file system path of the specification
+            output          output directory for the corpus
+
+        Returns:
+            Corpus for the specification
+        '''
+        with open(name) as spec_file:
+            spec = json.load(spec_file)
+
+        return Corpus(spec, output, Path(name).parent)
+
+    def values(spec: dict, key: str) -> list:
+        '''
+        Obtain the list of values for a matrix key of the specification.
+
+        Parameters:
+            spec            corpus specification
+            key             matrix key
+
+        Returns:
+            list of values for the key
+        '''
+        value = spec.get(key, DEFAULTS[key])
+        return value if isinstance(value, list) else [value]
+
+    def jobs(self) -> [dict]:
+        '''
+        Expand the specification into the list of archives to create. Each
+        archive is named after a digest of its options, so that names do not
+        depend on the order of the specification or on other archives.
+
+        Parameters:
+            None
+
+        Returns:
+            list of job dictionaries sorted by name
+        '''
+        jobs = []
+        shared = {key: self.spec[key] for key in ['files', 'sparse'] + CONTENT_KEYS if self.spec.get(key) is not None}
+
+        for combination in itertools.product(*[Corpus.values(self.spec, key) for key in MATRIX_KEYS]):
+
+            options = dict(zip(MATRIX_KEYS, combination))
+            options.update(shared)
+
+            digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+
+            options['digest'] = digest
+            options['name'] = f'slipit-{digest[:16]}{EXTENSIONS[options["type"]]}'
+
+            jobs.append(options)
+
+        return sorted(jobs, key=lambda job: job['name'])
+
+    def shard(self, index: int, count: int) -> [dict]:
+        '''
+        Obtain the jobs of the specified shard. Jobs are assigned by their digest,
+        which makes the partition deterministic and independent of the job order.
+
+        Parameters:
+            index           shard number (starting from 1)
+            count           total number of shards
+
+        Returns:
+            list of job dictionaries within the shard
+        '''
+        if not 1 <= index <= count:
+            raise ValueError(f'Invalid shard specification: {index}/{count}')
+
+        return [job for job in self.jobs() if int(job['digest'], 16) % count == index - 1]
+
+    def build(self, job: dict, path: Path) -> None:
+        '''
+        Create the archive for a job.
+
+        Parameters:
+            job             job dictionary
+            path            file system path of the archive to create
+
+        Returns:
+            None
+        '''
+        provider = ArchiveProvider.get_provider_ext(PROVIDER_EXTENSIONS[job['type']])
+        archive = provider.create(str(path))
+
+        content = None
+
+        if 'generate' in job:
+            content = parse_spec(job['generate'])
+            content.sparse = job.get('sparse', False)
+
+        try:
+            for file in job['files']:
+
+                payloads = get_traversals(Path(file).name, job['depth'], job['separator'], job['sequence'],
+                                          job['prefix'], job['increment'], job['multi'])
+
+                if 'static' in job:
+                    archive.append_blobs(job['static'].encode('utf-8'), payloads)
+
+                elif content is not None:
+                    archive.append_contents(content, payloads)
+
+                elif 'symlink' in job:
+                    archive.append_symlinks(job['symlink'], payloads)
+
+                else:
+                    archive.append_files(str(self.base / file), payloads)
+
+        finally:
+            archive.close_archive()
+
+    def checksum(path: Path) -> str:
+        '''
+        Calculate the sha256 checksum of a file.
+
+        Parameters:
+            path            file system path of the file
+
+        Returns:
+            hex encoded checksum
+        '''
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as file:
+
+            while chunk := file.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def load_journal(path: Path) -> dict:
+        '''
+        Load the completed outputs from a journal. Incomplete lines that were
+        left by an interrupted run are ignored.
+
+        Parameters:
+            path            file system path of the journal
+
+        Returns:
+            dictionary mapping output names to journal records
+        '''
+        records = dict()
+
+        if not path.is_file():
+            return records
+
+        with open(path) as journal:
+
+            for line in journal:
+
+                try:
+                    record = json.loads(line)
+                    records[record['name']] = record
+
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+        return records
+
+    def generate(self, index: int = 1, count: int = 1, callback=None) -> dict:
+        '''
+        Generate all archives of the specified shard. Outputs that are recorded
+        within the journal and still match their checksum are skipped. Each
+        created archive is moved into place atomically and recorded within the
+        journal before the next one is started. Finally, a manifest containing
+        all archives of the shard is written.
+
+        Parameters:
+            index           shard number (starting from 1)
+            count           total number of shards
+            callback        optional callable invoked with (job, skipped)
+
+        Returns:
+            manifest dictionary
+        '''
+        jobs = self.shard(index, count)
+        self.output.mkdir(parents=True, exist_ok=True)
+
+        journal_path = self.output / f'.slipit-journal-{index}-of-{count}.jsonl'
+        manifest_path = self.output / f'manifest-{index}-of-{count}.json'
+
+        records = Corpus.load_journal(journal_path)
+        entries = []
+
+        with open(journal_path, 'a') as journal:
+
+            for job in jobs:
+
+                path = self.output / job['name']
+                record = records.get(job['name'])
+                skipped = record is not None and path.is_file() and Corpus.checksum(path) == record['sha256']
+
+                if not skipped:
+
+                    tmp = self.output / f'.{job["name"]}.tmp'
+
+                    try:
+                        self.build(job, tmp)
+                        os.replace(tmp, path)
+
+                    except BaseException:
+                        tmp.unlink(missing_ok=True)
+                        raise
+
+                    record = {'name': job['name'], 'sha256': Corpus.checksum(path), 'size': path.stat().st_size}
+
+                    journal.write(json.dumps(record) + '\n')
+                    journal.flush()
+                    os.fsync(journal.fileno())
+
+                entry = {key: value for key, value in job.items() if key != 'digest'}
+                entry.update(record)
+                entries.append(entry)
+
+                if callback is not None:
+                    callback(job, skipped)
+
+        manifest = {'shard': f'{index}/{count}', 'archives': entries}
+
+        tmp = manifest_path.with_name(f'.{manifest_path.name}.tmp')
+        tmp.write_text(json.dumps(manifest, indent=2) + '\n')
+        os.replace(tmp, manifest_path)
+
+        return manifest
@@ -0,0 +1,996 @@
+from __future__ import annotations
+
+import io
+import os
+import gzip
+import stat
+import time
+import zlib
+import bisect
+import struct
+import tarfile
+from pathlib import Path
+
+
+INDEX_SUFFIX = '.slipit-index'
+INDEX_MAGIC = b'SLIPITIX'
+INDEX_VERSION = 3
+
+HEADER = struct.Struct('<8sIQ')
+RECORD = struct.Struct('<cI')
+RESUME = struct.Struct('<QQ')
+STATE = struct.Struct('<QqQ')
+CHECKPOINT = struct.Struct('<QQI')
+MEMBER = struct.Struct('<cQQQIQQdII')
+
+CHECKPOINT_INTERVAL = 1 << 20
+WINDOW_SIZE = 1 << 15
+CHUNK_SIZE = 1 << 16
+VERIFY_SIZE = 1 << 14
+
+FLUSH_MARKER = b'\x00\x00\xff\xff'
+
+
+class CheckpointGzipFile(gzip.GzipFile):
+    '''
+    GzipFile that performs a full flush at each multiple of the specified
+    amount of uncompressed data. After a full flush, the deflate stream
+    is byte aligned and does not reference earlier data, which allows
+    GzipIndex to restart decompression at these positions. The original
+    filename is omitted from the gzip header, so that the compressed stream
+    does not depend on the name of the file it is written to.
+    '''
+
+    def __init__(self, name: str, mode: str = 'wb', compresslevel: int = 9,
+                 fileobj=None, interval: int = CHECKPOINT_INTERVAL) -> None:
+        '''
+        Open the specified file for writing.
+
+        Parameters:
+            name            file system path of the archive
+            mode            file mode to open the archive with
+            compresslevel   zlib compression level
+            fileobj         already opened file object to write to
+            interval        uncompressed bytes between two full flushes
+
+        Returns:
+            None
+        '''
+        self.raw = open(name, mode) if fileobj is None else None
+        self.interval = interval
+        self.pending = 0
+
+        super().__init__('', mode, compresslevel, fileobj or self.raw)
+
+    def write(self, data) -> int:
+        '''
+        Compress the specified data and perform a full flush each time a
+        multiple of the checkpoint interval was reached. The data is split at
+        these offsets, so that flush points do not depend on how the data is
+        passed to this method.
+
+        Parameters:
+            data            data to compress
+
+        Returns:
+            number of uncompressed bytes written
+        '''
+        view = memoryview(data).cast('B')
+        written = 0
+
+        while written < len(view):
+
+            part = view[written:written + self.interval - self.pending]
+            written += super().write(part)
+            self.pending += len(part)
+
+            if self.pending >= self.interval:
+                self.flush(zlib.Z_FULL_FLUSH)
+                self.pending = 0
+
+        return written
+
+    def close(self) -> None:
+        '''
+        Close the gzip stream and the underlying file if it was opened by
+        this object.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        try:
+            super().close()
+
+        finally:
+            if self.raw is not None:
+                self.raw.close()
+
+
+class CheckpointTarFile(tarfile.TarFile):
+    '''
+    TarFile that uses CheckpointGzipFile when writing gzip compressed archives.
+    '''
+
+    @classmethod
+    def gzopen(cls, name, mode='r', fileobj=None, compresslevel=9, **kwargs):
+        '''
+        Open gzip compressed tar archives. Archives opened for writing
+        contain full flush points that can be used by GzipIndex.
+        '''
+        if mode != 'w':
+            return super().gzopen(name, mode, fileobj, compresslevel, **kwargs)
+
+        fileobj = CheckpointGzipFile(name, 'wb', compresslevel, fileobj)
+
+        try:
+            tar_file = cls.taropen(name, mode, fileobj, **kwargs)
+
+        except BaseException:
+            fileobj.close()
+            raise
+
+        tar_file._extfileobj = False
+        return tar_file
+
+
+class Checkpoint:
+    '''
+    Position within a gzip file where decompression can be restarted.
+    '''
+
+    def __init__(self, cin: int, uout: int, window: bytes = b'', fingerprint: int = 0) -> None:
+        '''
+        Initialize the checkpoint.
+
+        Parameters:
+            cin             offset of the deflate data within the gzip file
+            uout            corresponding offset within the uncompressed data
+            window          last 32KiB of uncompressed data before the checkpoint
+            fingerprint     crc32 of the compressed data from the first checkpoint
+
+        Returns:
+            None
+        '''
+        self.cin = cin
+        self.uout = uout
+        self.window = window
+        self.fingerprint = fingerprint
+
+    def pack(self) -> bytes:
+        '''
+        Serialize the checkpoint for storing it within the index file. The
+        window is only stored if the checkpoint requires one.
+        '''
+        window = zlib.compress(self.window) if self.window else b''
+        return CHECKPOINT.pack(self.cin, self.uout, self.fingerprint) + window
+
+    def unpack(data: bytes) -> Checkpoint:
+        '''
+        Deserialize a checkpoint that was stored within an index file.
+        '''
+        cin, uout, fingerprint = CHECKPOINT.unpack_from(data)
+        window = data[CHECKPOINT.size:]
+
+        return Checkpoint(cin, uout, zlib.decompress(window) if window else b'', fingerprint)
+
+
+class InflateReader(io.RawIOBase):
+    '''
+    Read only file object on top of an iterator of uncompressed chunks.
+    '''
+
+    def __init__(self, chunks) -> None:
+        self.chunks = chunks
+        self.buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+
+        while not self.buffer:
+
+            try:
+                self.buffer = next(self.chunks)
+
+            except StopIteration:
+                return 0
+
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+
+        return size
+
+
+class GzipIndex:
+    '''
+    zran style checkpoint index for gzip compressed tar archives. The index
+    stores restart points within the deflate stream together with the offsets
+    of all tar members and is kept as a sidecar file next to the archive.
+
+    Restart points are positions where the deflate stream is byte aligned,
+    which is the case for flush points and gzip member boundaries. Archives
+    written by slipit contain full flush points every CHECKPOINT_INTERVAL
+    bytes of uncompressed data. For archives without such points, the index
+    only contains the start of the stream and random access degrades to
+    decompressing everything in front of the requested data. Checkpoints
+    at full flush points do not reference earlier data and are stored
+    without a window.
+
+    The sidecar file is an append only log of records. Each update of the
+    index appends a record that states how many of the stored checkpoints
+    and members are still valid, followed by the new checkpoints and members
+    and a state record that completes the update. Incomplete updates at the
+    end of the file are ignored when loading the index.
+    '''
+
+    def __init__(self, name: str, interval: int = CHECKPOINT_INTERVAL) -> None:
+        '''
+        Initialize an empty index for the specified archive.
+
+        Parameters:
+            name            file system path of the archive
+            interval        minimum uncompressed bytes between two checkpoints
+
+        Returns:
+            None
+        '''
+        self.name = name
+        self.interval = interval
+        self.size = None
+        self.mtime = None
+        self.tar_end = 0
+        self.checkpoints = []
+        self.members = []
+        self.stored = None
+        self.length = 0
+
+    def index_path(name: str) -> str:
+        '''
+        Return the path of the sidecar index file for the specified archive.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            file system path of the index file
+        '''
+        return name + INDEX_SUFFIX
+
+    def open(name: str, interval: int = CHECKPOINT_INTERVAL) -> GzipIndex:
+        '''
+        Return an up to date index for the specified archive. An existing
+        sidecar index is reused and only extended for data that was added
+        since the index was written. Otherwise, a new index is built. The
+        resulting index is written back to the sidecar file. If the sidecar
+        file cannot be written, the index is only kept in memory.
+
+        Parameters:
+            name            file system path of the archive
+            interval        minimum uncompressed bytes between two checkpoints
+
+        Returns:
+            GzipIndex for the archive
+        '''
+        if not Path(name).is_file():
+            raise FileNotFoundError(name)
+
+        index = GzipIndex.load(name)
+
+        if index is None:
+            index = GzipIndex(name, interval)
+
+        if index.update():
+
+            try:
+                index.save()
+
+            except OSError:
+                pass
+
+        return index
+
+    def load(name: str) -> GzipIndex:
+        '''
+        Load the sidecar index of the specified archive.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            GzipIndex or None if no usable index file exists
+        '''
+        try:
+            with open(GzipIndex.index_path(name), 'rb') as index_file:
+                data = index_file.read()
+
+        except OSError:
+            return None
+
+        if len(data) < HEADER.size:
+            return None
+
+        magic, version, interval = HEADER.unpack_from(data)
+
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            return None
+
+        index = GzipIndex(name, interval)
+
+        try:
+            index.replay(GzipIndex.records(data, HEADER.size))
+
+        except (ValueError, struct.error, zlib.error):
+            pass
+
+        if index.length == 0:
+            return None
+
+        index.stored = (len(index.checkpoints), len(index.members))
+
+        return index
+
+    def records(data: bytes, position: int):
+        '''
+        Yield the complete records of an index file. A record that is cut off
+        by the end of the data ends the iteration.
+
+        Parameters:
+            data            content of the index file
+            position        offset of the first record
+
+        Returns:
+            generator of (kind, record, end) tuples
+        '''
+        while position + RECORD.size <= len(data):
+
+            kind, length = RECORD.unpack_from(data, position)
+            end = position + RECORD.size + length
+
+            if end > len(data):
+                return
+
+            yield kind, data[position + RECORD.size:end], end
+            position = end
+
+    def replay(self, records) -> None:
+        '''
+        Apply the records of an index file to the index. Changes only take
+        effect once the state record that completes an update was applied.
+        If a record cannot be parsed, the last completed state is kept.
+
+        Parameters:
+            records         generator returned by GzipIndex.records
+
+        Returns:
+            None
+        '''
+        checkpoints, members = [], []
+
+        for kind, record, end in records:
+
+            if kind == b'R':
+                kept_checkpoints, kept_members = RESUME.unpack(record)
+                checkpoints = self.checkpoints[:kept_checkpoints]
+                members = self.members[:kept_members]
+
+            elif kind == b'C':
+                checkpoints.append(Checkpoint.unpack(record))
+
+            elif kind == b'M':
+                members.append(GzipIndex.unpack_member(record))
+
+            elif kind == b'S':
+                self.size, self.mtime, self.tar_end = STATE.unpack(record)
+                self.checkpoints, self.members = checkpoints, members
+                self.length = end
+
+            else:
+                raise ValueError(f'Unknown index record: {kind!r}')
+
+    def save(self) -> None:
+        '''
+        Write the index to its sidecar file. If the sidecar file already
+        contains a previous state of the index, only the changes are appended.
+        Otherwise, the sidecar file is replaced.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        path = GzipIndex.index_path(self.name)
+        kept_checkpoints, kept_members = self.stored or (0, 0)
+
+        records = [(b'R', RESUME.pack(kept_checkpoints, kept_members))]
+        records += [(b'C', checkpoint.pack()) for checkpoint in self.checkpoints[kept_checkpoints:]]
+        records += [(b'M', GzipIndex.pack_member(member)) for member in self.members[kept_members:]]
+        records += [(b'S', STATE.pack(self.size, self.mtime, self.tar_end))]
+
+        data = b''.join(RECORD.pack(kind, len(record)) + record for kind, record in records)
+
+        if self.stored is None:
+
+            data = HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.interval) + data
+
+            with open(path + '.tmp', 'wb') as index_file:
+                index_file.write(data)
+
+            os.replace(path + '.tmp', path)
+            self.length = len(data)
+
+        else:
+
+            with open(path, 'r+b') as index_file:
+                index_file.truncate(self.length)
+                index_file.seek(self.length)
+                index_file.write(data)
+
+            self.length += len(data)
+
+        self.stored = (len(self.checkpoints), len(self.members))
+
+    def pack_member(member: tarfile.TarInfo) -> bytes:
+        '''
+        Serialize the header information of a tar member.
+        '''
+        data = MEMBER.pack(member.type, member.size, member.offset, member.offset_data, member.mode,
+                           member.uid, member.gid, member.mtime, member.devmajor, member.devminor)
+
+        for value in [member.name, member.linkname, member.uname, member.gname]:
+            value = value.encode('utf-8', 'surrogateescape')
+            data += struct.pack('<I', len(value)) + value
+
+        return data
+
+    def unpack_member(data: bytes) -> tarfile.TarInfo:
+        '''
+        Deserialize the header information of a tar member.
+        '''
+        member = tarfile.TarInfo()
+        (member.type, member.size, member.offset, member.offset_data, member.mode, member.uid,
+         member.gid, member.mtime, member.devmajor, member.devminor) = MEMBER.unpack_from(data)
+
+        if member.mtime.is_integer():
+            member.mtime = int(member.mtime)
+
+        position = MEMBER.size
+
+        for key in ['name', 'linkname', 'uname', 'gname']:
+            length, = struct.unpack_from('<I', data, position)
+            value = data[position + 4:position + 4 + length]
+
+            if len(value) < length:
+                raise struct.error('truncated member record')
+
+            setattr(member, key, value.decode('utf-8', 'surrogateescape'))
+            position += 4 + length
+
+        return member
+
+    def update(self) -> bool:
+        '''
+        Bring the index up to date with the archive on disk. If the archive
+        was modified after the index was written, decompression restarts at
+        the last checkpoint that is still valid, so that only data behind this
+        checkpoint needs to be inflated.
+
+        Parameters:
+            None
+
+        Returns:
+            True if the index was modified
+        '''
+        info = os.stat(self.name)
+
+        if self.size == info.st_size and self.mtime == info.st_mtime_ns:
+            return False
+
+        with open(self.name, 'rb') as archive:
+
+            checkpoint = self.valid_checkpoint(archive)
+
+            if checkpoint is not None:
+
+                try:
+                    self.checkpoints = self.checkpoints[:self.checkpoints.index(checkpoint) + 1]
+                    self.scan_members(archive, checkpoint)
+
+                except (tarfile.ReadError, EOFError, zlib.error):
+                    checkpoint = None
+
+            if checkpoint is None:
+                self.checkpoints = [Checkpoint(GzipIndex.skip_header(archive, 0), 0)]
+                self.members = []
+                self.tar_end = 0
+                self.stored = None
+                self.scan_members(archive, self.checkpoints[0])
+
+        self.size = info.st_size
+        self.mtime = info.st_mtime_ns
+
+        return True
+
+    def valid_checkpoint(self, archive) -> Checkpoint:
+        '''
+        Return the last checkpoint whose preceding compressed data still matches
+        the recorded fingerprint. Fingerprints cover all compressed data between
+        the first checkpoint and the respective checkpoint, so that a modification
+        anywhere in front of a checkpoint invalidates it. The gzip header in front
+        of the first checkpoint is excluded, as it contains a timestamp that
+        changes each time the archive is rewritten.
+
+        Parameters:
+            archive         file object of the opened archive
+
+        Returns:
+            Checkpoint or None if no checkpoint is still valid
+        '''
+        if not self.checkpoints or GzipIndex.skip_header(archive, 0) != self.checkpoints[0].cin:
+            return None
+
+        valid = self.checkpoints[0]
+        crc = valid.fingerprint
+
+        for previous, checkpoint in zip(self.checkpoints, self.checkpoints[1:]):
+
+            if checkpoint.uout > self.tar_end:
+                break
+
+            crc = GzipIndex.fingerprint(archive, previous.cin, checkpoint.cin, crc)
+
+            if crc != checkpoint.fingerprint:
+                break
+
+            valid = checkpoint
+
+        return valid
+
+    def scan_members(self, archive, checkpoint: Checkpoint) -> None:
+        '''
+        Parse the tar headers behind the specified checkpoint. Members that
+        start before the checkpoint are kept from the previous index. All
+        other members are parsed again.
+
+        Parameters:
+            archive         file object of the opened archive
+            checkpoint      checkpoint to restart decompression from
+
+        Returns:
+            None
+        '''
+        resume = self.tar_end
+
+        for member in self.members:
+
+            if member.offset >= checkpoint.uout:
+                resume = member.offset
+                break
+
+        self.members = [member for member in self.members if member.offset < resume]
+
+        if self.stored is not None:
+            self.stored = (min(self.stored[0], len(self.checkpoints)), min(self.stored[1], len(self.members)))
+
+        chunks = self.inflate(archive, checkpoint, True)
+        reader = io.BufferedReader(InflateReader(chunks), CHUNK_SIZE)
+        reader.read(resume - checkpoint.uout)
+
+        with tarfile.open(fileobj=reader, mode='r|') as tar_file:
+
+            for member in tar_file:
+                member.offset += resume
+                member.offset_data += resume
+                self.members.append(member)
+
+            self.tar_end = resume + tar_file.offset
+
+    def inflate(self, archive, checkpoint: Checkpoint, record: bool = False):
+        '''
+        Decompress the archive starting from the specified checkpoint and yield
+        the uncompressed data in chunks. If record is True, new checkpoints are
+        added to the index while decompressing.
+
+        Parameters:
+            archive         file object of the opened archive
+            checkpoint      checkpoint to start decompression at
+            record          whether to record new checkpoints
+
+        Returns:
+            generator of uncompressed data chunks
+        '''
+        position = checkpoint.cin
+        total = checkpoint.uout
+        window = checkpoint.window
+        decompressor = GzipIndex.decompressor(window)
+        tail = b''
+        pending = None
+
+        while True:
+
+            archive.seek(position)
+            data = archive.read(CHUNK_SIZE)
+
+            if not data:
+                raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+
+            pieces = GzipIndex.split_at_markers(tail, data) if record else [(data, False)]
+
+            for piece, at_marker in pieces:
+
+                start = position
+                position += len(piece)
+
+                for output in GzipIndex.decompress_piece(decompressor, piece):
+
+                    total += len(output)
+                    window = (window + output)[-WINDOW_SIZE:]
+
+                    if pending is not None:
+                        pending = self.verify_checkpoint(archive, pending, output)
+
+                    yield output
+
+                if decompressor.eof:
+                    position = start + len(piece) - len(decompressor.unused_data) + 8
+                    next_member = GzipIndex.skip_header(archive, position)
+
+                    if next_member is None:
+                        return
+
+                    position = next_member
+                    decompressor = GzipIndex.decompressor(b'')
+                    window = tail = b''
+                    pending = None
+
+                    if record and total - self.checkpoints[-1].uout >= self.interval:
+                        self.add_checkpoint(archive, Checkpoint(position, total))
+
+                    break
+
+                if at_marker and pending is None and total - self.checkpoints[-1].uout >= self.interval:
+                    pending = self.trial_checkpoint(archive, Checkpoint(position, total, window))
+
+            else:
+                tail = (tail + data)[1 - len(FLUSH_MARKER):]
+
+    def decompress_piece(decompressor, piece: bytes):
+        '''
+        Decompress a piece of compressed data in chunks of limited size.
+        Decompression stops at the end of the current gzip member.
+
+        Parameters:
+            decompressor    zlib decompressor to use
+            piece           compressed data
+
+        Returns:
+            generator of uncompressed data chunks
+        '''
+        unconsumed = piece
+
+        while unconsumed and not decompressor.eof:
+
+            output = decompressor.decompress(unconsumed, CHUNK_SIZE)
+            unconsumed = decompressor.unconsumed_tail
+
+            if output:
+                yield output
+
+    def trial_checkpoint(self, archive, checkpoint: Checkpoint):
+        '''
+        Decompress a small amount of data starting at a candidate checkpoint.
+        Flush markers can also appear by chance within compressed data. The
+        candidate is only accepted after the output of the trial decompression
+        was confirmed by the regular decompression.
+
+        Decompression is first attempted without a window. Data behind a full
+        flush does not reference earlier data, which is proven once a whole
+        window of output was produced. Such checkpoints are stored without a
+        window. Otherwise, the window of the candidate is used.
+
+        Parameters:
+            archive         file object of the opened archive
+            checkpoint      candidate checkpoint
+
+        Returns:
+            tuple of checkpoint, expected output and confirmed output or None
+        '''
+        for window, size in [(b'', WINDOW_SIZE), (checkpoint.window, VERIFY_SIZE)]:
+
+            try:
+                expected = GzipIndex.trial_inflate(archive, checkpoint.cin, window, size)
+
+            except zlib.error:
+                continue
+
+            if expected:
+                checkpoint.window = window
+                return (checkpoint, expected, b'')
+
+        return None
+
+    def trial_inflate(archive, position: int, window: bytes, size: int) -> bytes:
+        '''
+        Decompress up to the specified amount of data starting at the specified
+        position of the deflate stream.
+
+        Parameters:
+            archive         file object of the opened archive
+            position        offset of the deflate data
+            window          window to prime the decompressor with
+            size            maximum number of bytes to decompress
+
+        Returns:
+            uncompressed data
+        '''
+        decompressor = GzipIndex.decompressor(window)
+        output = b''
+
+        archive.seek(position)
+
+        while len(output) < size and not decompressor.eof:
+
+            data = decompressor.unconsumed_tail or archive.read(VERIFY_SIZE)
+
+            if not data:
+                break
+
+            output += decompressor.decompress(data, size - len(output))
+
+        return output
+
+    def verify_checkpoint(self, archive, pending: tuple, output: bytes):
+        '''
+        Compare the output of the regular decompression against the output
+        of a trial decompression and add the checkpoint once it is confirmed.
+
+        Parameters:
+            archive         file object of the opened archive
+            pending         tuple returned by trial_checkpoint
+            output          new output of the regular decompression
+
+        Returns:
+            updated pending tuple or None if the candidate was resolved
+        '''
+        checkpoint, expected, confirmed = pending
+        confirmed += output[:len(expected) - len(confirmed)]
+
+        if not expected.startswith(confirmed):
+            return None
+
+        if len(confirmed) < len(expected):
+            return (checkpoint, expected, confirmed)
+
+        self.add_checkpoint(archive, checkpoint)
+        return None
+
+    def add_checkpoint(self, archive, checkpoint: Checkpoint) -> None:
+        '''
+        Record the fingerprint of the compressed data in front of the checkpoint
+        and add it to the index. The fingerprint continues the fingerprint of the
+        previous checkpoint, so that only the data in between needs to be read.
+
+        Parameters:
+            archive         file object of the opened archive
+            checkpoint      checkpoint to add
+
+        Returns:
+            None
+        '''
+        previous = self.checkpoints[-1]
+        checkpoint.fingerprint = GzipIndex.fingerprint(archive, previous.cin, checkpoint.cin, previous.fingerprint)
+        self.checkpoints.append(checkpoint)
+
+    def split_at_markers(tail: bytes, data: bytes) -> [(bytes, bool)]:
+        '''
+        Split the specified data after each flush marker. The tail of the
+        previously processed data is used to find markers that cross the
+        boundary between two chunks.
+
+        Parameters:
+            tail            last bytes of the previous chunk
+            data            data to split
+
+        Returns:
+            list of data pieces and whether they end with a flush marker
+        '''
+        pieces = []
+        buffer = tail + data
+        start = 0
+        offset = buffer.find(FLUSH_MARKER)
+
+        while offset != -1:
+
+            end = offset + len(FLUSH_MARKER) - len(tail)
+
+            if end > start:
+                pieces.append((data[start:end], True))
+                start = end
+
+            offset = buffer.find(FLUSH_MARKER, offset + 1)
+
+        if start < len(data):
+            pieces.append((data[start:], False))
+
+        return pieces
+
+    def decompressor(window: bytes):
+        '''
+        Create a raw deflate decompressor primed with the specified window.
+        '''
+        if window:
+            return zlib.decompressobj(-zlib.MAX_WBITS, zdict=window)
+
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def fingerprint(archive, start: int, end: int, crc: int = 0) -> int:
+        '''
+        Continue the crc32 of the compressed data with the specified range.
+
+        Parameters:
+            archive         file object of the opened archive
+            start           start offset of the range
+            end             end offset of the range
+            crc             crc32 of the data in front of the range
+
+        Returns:
+            crc32 including the specified range
+        '''
+        archive.seek(start)
+
+        while start < end:
+
+            data = archive.read(min(CHUNK_SIZE, end - start))
+
+            if not data:
+                break
+
+            crc = zlib.crc32(data, crc)
+            start += len(data)
+
+        return crc
+
+    def skip_header(archive, position: int) -> int:
+        '''
+        Parse the gzip member header at the specified position.
+
+        Parameters:
+            archive         file object of the opened archive
+            position        offset of the gzip header
+
+        Returns:
+            offset of the deflate data or None if no further member exists
+        '''
+        archive.seek(position)
+        header = archive.read(10)
+
+        if len(header) < 10 or header[:2] != b'\x1f\x8b':
+
+            if position == 0:
+                raise tarfile.ReadError('not a gzip file')
+
+            return None
+
+        if header[2] != 8:
+            raise tarfile.ReadError('unsupported compression method')
+
+        flags = header[3]
+
+        if flags & gzip.FEXTRA:
+            length = int.from_bytes(archive.read(2), 'little')
+            archive.seek(length, os.SEEK_CUR)
+
+        for flag in [gzip.FNAME, gzip.FCOMMENT]:
+
+            if flags & flag:
+                while archive.read(1) not in [b'\x00', b'']:
+                    pass
+
+        if flags & gzip.FHCRC:
+            archive.seek(2, os.SEEK_CUR)
+
+        return archive.tell()
+
+    def read(self, offset: int, size: int) -> bytes:
+        '''
+        Read uncompressed data starting at the specified offset. Decompression
+        starts at the closest checkpoint in front of the offset.
+
+        Parameters:
+            offset          offset within the uncompressed data
+            size            number of bytes to read
+
+        Returns:
+            uncompressed data
+        '''
+        positions = [checkpoint.uout for checkpoint in self.checkpoints]
+        checkpoint = self.checkpoints[bisect.bisect_right(positions, offset) - 1]
+
+        skip = offset - checkpoint.uout
+        data = bytearray()
+
+        with open(self.name, 'rb') as archive:
+
+            for chunk in self.inflate(archive, checkpoint):
+
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+
+                data += chunk[skip:skip + size - len(data)]
+                skip = 0
+
+                if len(data) >= size:
+                    break
+
+        return bytes(data)
+
+    def getmember(self, name: str) -> tarfile.TarInfo:
+        '''
+        Return the last member with the specified name.
+
+        Parameters:
+            name            name of the member within the archive
+
+        Returns:
+            TarInfo for the member
+        '''
+        for member in reversed(self.members):
+
+            if member.name == name:
+                return member
+
+        raise KeyError(f'filename {name!r} not found')
+
+    def extractfile(self, member: tarfile.TarInfo) -> bytes:
+        '''
+        Return the content of the specified member.
+
+        Parameters:
+            member          TarInfo or name of the member
+
+        Returns:
+            content of the member
+        '''
+        if isinstance(member, str):
+            member = self.getmember(member)
+
+        return self.read(member.offset_data, member.size)
+
+    def list(self) -> None:
+        '''
+        Print a list of the archives content to stdout, using the same format
+        as TarFile.list.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        for member in self.members:
+
+            line = [stat.filemode(member.mode)]
+            line.append(f'{member.uname or member.uid}/{member.gname or member.gid}')
+
+            if member.ischr() or member.isblk():
+                line.append('%10s' % f'{member.devmajor},{member.devminor}')
+
+            else:
+                line.append('%10d' % member.size)
+
+            line.append('%d-%02d-%02d %02d:%02d:%02d' % time.localtime(member.mtime)[:6])
+            line.append(member.name + ('/' if member.isdir() else ''))
+
+            if member.issym():
+                line.append('-> ' + member.linkname)
+
+            if member.islnk():
+                line.append('link to ' + member.linkname)
+
+            print(' '.join(line), '')
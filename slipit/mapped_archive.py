@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import mmap
+import struct
+import tarfile
+import zipfile
+
+
+ZIP_END_SIGNATURE = b'PK\x05\x06'
+ZIP64_END_SIGNATURE = b'PK\x06\x06'
+ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+ZIP_CENTRAL_SIGNATURE = b'PK\x01\x02'
+ZIP_LOCAL_SIGNATURE = b'PK\x03\x04'
+ZIP_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+
+ZIP_END_STRUCT = struct.Struct('<4s4H2LH')
+ZIP64_END_STRUCT = struct.Struct('<4sQ2H2L4Q')
+ZIP64_LOCATOR_STRUCT = struct.Struct('<4sLQL')
+ZIP_CENTRAL_STRUCT = struct.Struct('<4s4B4HL2L5H2L')
+ZIP_LOCAL_STRUCT = struct.Struct('<4s2B4HL2L2H')
+
+ZIP_MAX_COMMENT = (1 << 16) - 1
+ZIP_DATA_DESCRIPTOR = 0x08
+ZIP_UTF8_FILENAME = 0x800
+
+
+class MappedArchive:
+    '''
+    Base class for read only archives that are accessed through a memory map.
+    Member data is handed out as memoryview slices of the mapped file, that
+    are only valid until the archive is closed.
+    '''
+
+    def __init__(self, name: str) -> None:
+        '''
+        Map the specified archive into memory.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            None
+        '''
+        self.name = name
+
+        with open(name, 'rb') as archive:
+
+            try:
+                self.map = mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ)
+
+            except ValueError:
+                self.map = None
+
+        self.view = memoryview(self.map) if self.map is not None else memoryview(b'')
+
+    def __enter__(self) -> MappedArchive:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''
+        Unmap the archive.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        try:
+            self.view.release()
+
+            if self.map is not None:
+                self.map.close()
+
+        except BufferError:
+            # memoryviews handed out by the archive are still referenced. The
+            # map is released by the garbage collector once they are dropped.
+            pass
+
+
+class MappedZip(MappedArchive):
+    '''
+    Zip archive that parses the end of central directory record and the central
+    directory directly from the mapped file. Entries are represented as ZipInfo
+    objects, so that they can be used together with zipfile.ZipFile.
+    '''
+
+    def __init__(self, name: str) -> None:
+        '''
+        Map the specified archive and parse its central directory.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            None
+        '''
+        super().__init__(name)
+
+        try:
+            self.entries = self.parse_central_directory()
+
+        except BaseException:
+            self.close()
+            raise
+
+    def parse_central_directory(self) -> [zipfile.ZipInfo]:
+        '''
+        Locate the end of central directory record and parse all central
+        directory entries.
+
+        Parameters:
+            None
+
+        Returns:
+            list of ZipInfo objects for all archive entries
+        '''
+        view = self.view
+        search_start = max(0, len(view) - ZIP_END_STRUCT.size - ZIP_MAX_COMMENT)
+        end = self.map.rfind(ZIP_END_SIGNATURE, search_start) if self.map is not None else -1
+
+        if end == -1 or end + ZIP_END_STRUCT.size > len(view):
+            raise zipfile.BadZipFile('File is not a zip file')
+
+        _, _, _, _, _, size, offset, comment_length = ZIP_END_STRUCT.unpack_from(view, end)
+        self.comment = bytes(view[end + ZIP_END_STRUCT.size:end + ZIP_END_STRUCT.size + comment_length])
+
+        directory_end = end
+        locator = end - ZIP64_LOCATOR_STRUCT.size
+
+        if locator >= 0 and view[locator:locator + 4] == ZIP64_LOCATOR_SIGNATURE:
+
+            zip64_end = locator - ZIP64_END_STRUCT.size
+
+            if zip64_end < 0 or view[zip64_end:zip64_end + 4] != ZIP64_END_SIGNATURE:
+                raise zipfile.BadZipFile('Corrupt zip64 end of central directory record')
+
+            fields = ZIP64_END_STRUCT.unpack_from(view, zip64_end)
+            size, offset = fields[8], fields[9]
+            directory_end = zip64_end
+
+        concat = directory_end - size - offset
+
+        if concat < 0:
+            raise zipfile.BadZipFile('Bad offset for central directory')
+
+        entries = []
+        position = self.start_dir = offset + concat
+
+        while position < directory_end:
+
+            if position + ZIP_CENTRAL_STRUCT.size > directory_end:
+                raise zipfile.BadZipFile('Truncated central directory')
+
+            fields = ZIP_CENTRAL_STRUCT.unpack_from(view, position)
+
+            if fields[0] != ZIP_CENTRAL_SIGNATURE:
+                raise zipfile.BadZipFile('Bad magic number for central directory')
+
+            name_length, extra_length, comment_length = fields[12:15]
+            start = position + ZIP_CENTRAL_STRUCT.size
+
+            filename = bytes(view[start:start + name_length])
+            flags = fields[5]
+
+            info = zipfile.ZipInfo(filename.decode('utf-8' if flags & ZIP_UTF8_FILENAME else 'cp437'))
+            info.extra = bytes(view[start + name_length:start + name_length + extra_length])
+            info.comment = bytes(view[start + name_length + extra_length:start + name_length + extra_length + comment_length])
+
+            (info.create_version, info.create_system, info.extract_version, info.reserved,
+             info.flag_bits, info.compress_type, time, date,
+             info.CRC, info.compress_size, info.file_size) = fields[1:12]
+            info.volume, info.internal_attr, info.external_attr, info.header_offset = fields[15:19]
+
+            info.date_time = ((date >> 9) + 1980, (date >> 5) & 0xF, date & 0x1F,
+                              time >> 11, (time >> 5) & 0x3F, (time & 0x1F) * 2)
+
+            MappedZip.decode_zip64(info)
+            info.header_offset += concat
+
+            entries.append(info)
+            position = start + name_length + extra_length + comment_length
+
+        return entries
+
+    def decode_zip64(info: zipfile.ZipInfo) -> None:
+        '''
+        Replace size and offset fields of a ZipInfo that overflowed by the
+        values stored in the zip64 extra field.
+
+        Parameters:
+            info            ZipInfo to update
+
+        Returns:
+            None
+        '''
+        extra = info.extra
+
+        while len(extra) >= 4:
+
+            kind, length = struct.unpack_from('<HH', extra)
+
+            if kind == 1:
+                data = extra[4:length + 4]
+
+                for field in ['file_size', 'compress_size', 'header_offset']:
+
+                    if getattr(info, field) == 0xFFFFFFFF and len(data) >= 8:
+                        setattr(info, field, struct.unpack_from('<Q', data)[0])
+                        data = data[8:]
+
+            extra = extra[length + 4:]
+
+    def strip_zip64(extra: bytes) -> bytes:
+        '''
+        Remove the zip64 extra field from an extra field buffer. The field is
+        added again when required while writing the entry.
+
+        Parameters:
+            extra           extra field buffer
+
+        Returns:
+            extra field buffer without zip64 field
+        '''
+        result = b''
+
+        while len(extra) >= 4:
+
+            kind, length = struct.unpack_from('<HH', extra)
+
+            if kind != 1:
+                result += extra[:length + 4]
+
+            extra = extra[length + 4:]
+
+        return result
+
+    def infolist(self) -> [zipfile.ZipInfo]:
+        '''
+        Return the list of archive entries in central directory order.
+
+        Parameters:
+            None
+
+        Returns:
+            list of ZipInfo objects
+        '''
+        return self.entries
+
+    def raw_data(self, info: zipfile.ZipInfo) -> memoryview:
+        '''
+        Return the compressed data of the specified entry without copying it.
+
+        Parameters:
+            info            ZipInfo of the entry
+
+        Returns:
+            memoryview of the compressed entry data
+        '''
+        position = info.header_offset
+        fields = ZIP_LOCAL_STRUCT.unpack_from(self.view, position)
+
+        if fields[0] != ZIP_LOCAL_SIGNATURE:
+            raise zipfile.BadZipFile('Bad magic number for file header')
+
+        start = position + ZIP_LOCAL_STRUCT.size + fields[10] + fields[11]
+        return self.view[start:start + info.compress_size]
+
+    def copy_raw(self, info: zipfile.ZipInfo, output: zipfile.ZipFile, archived_name: str = None) -> None:
+        '''
+        Copy an entry into a zip file that is opened for writing. The compressed
+        data is written straight from the memory map without decompressing it.
+        The entry is registered within the output archive, so that it becomes
+        part of its central directory.
+
+        Parameters:
+            info            ZipInfo of the entry
+            output          ZipFile to copy the entry into
+            archived_name   new name for the entry
+
+        Returns:
+            None
+        '''
+        data = self.raw_data(info)
+
+        entry = zipfile.ZipInfo(archived_name or info.filename, info.date_time)
+
+        for field in ['comment', 'create_system', 'create_version', 'extract_version', 'reserved',
+                      'flag_bits', 'compress_type', 'CRC', 'compress_size', 'file_size',
+                      'volume', 'internal_attr', 'external_attr']:
+            setattr(entry, field, getattr(info, field))
+
+        entry.extra = MappedZip.strip_zip64(info.extra)
+        entry.header_offset = output.fp.tell()
+
+        zip64 = entry.file_size > zipfile.ZIP64_LIMIT or entry.compress_size > zipfile.ZIP64_LIMIT
+
+        output.fp.write(entry.FileHeader(zip64))
+        output.fp.write(data)
+
+        if entry.flag_bits & ZIP_DATA_DESCRIPTOR:
+            descriptor = '<4sLQQ' if zip64 else '<4sLLL'
+            output.fp.write(struct.pack(descriptor, ZIP_DESCRIPTOR_SIGNATURE, entry.CRC,
+                                        entry.compress_size, entry.file_size))
+
+        output.filelist.append(entry)
+        output.NameToInfo[entry.filename] = entry
+        output.start_dir = output.fp.tell()
+
+    def printdir(self) -> None:
+        '''
+        Print a table of contents using the same format as ZipFile.printdir.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        print('%-46s %19s %12s' % ('File Name', 'Modified    ', 'Size'))
+
+        for info in self.entries:
+            date = '%d-%02d-%02d %02d:%02d:%02d' % info.date_time[:6]
+            print('%-46s %s %12d' % (info.filename, date, info.file_size))
+
+
+class MappedTar(MappedArchive):
+    '''
+    Uncompressed tar archive on top of a memory map, used for copying the
+    raw bytes of whole members when rewriting an archive. Headers are still
+    parsed by tarfile through the file interface of the map. Most of the
+    parsing time is spent decoding the header fields, not reading them, so
+    a separate header walker over the map would duplicate the pax and GNU
+    handling of tarfile without making listings noticeably faster.
+    '''
+
+    def __init__(self, name: str) -> None:
+        '''
+        Map the specified archive and parse all member headers.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            None
+        '''
+        super().__init__(name)
+
+        try:
+            if self.map is None:
+                raise tarfile.ReadError('empty file')
+
+            self.tar_file = tarfile.open(fileobj=self.map, mode='r:')
+            self.members = self.tar_file.getmembers()
+            self.end = self.tar_file.offset
+
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        '''
+        Close the tar file and unmap the archive.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        if getattr(self, 'tar_file', None) is not None:
+            self.tar_file.close()
+
+        super().close()
+
+    def raw_members(self):
+        '''
+        Yield all members together with their raw bytes within the archive.
+        The raw bytes include extended headers, the member header, the member
+        data and padding.
+
+        Parameters:
+            None
+
+        Returns:
+            generator of (TarInfo, memoryview) tuples
+        '''
+        for member, following in zip(self.members, self.members[1:] + [None]):
+
+            end = following.offset if following is not None else self.end
+            yield member, self.view[member.offset:end]
+
+    def extractfile(self, member: tarfile.TarInfo):
+        '''
+        Return a file object for the content of the specified member.
+
+        Parameters:
+            member          TarInfo of the member
+
+        Returns:
+            file object or None for members without content
+        '''
+        return self.tar_file.extractfile(member)
@@ -5,6 +5,7 @@ import fnmatch
 import tarfile
 from pathlib import Path
 from slipit.archive_provider import ArchiveProvider
+from slipit.gzip_index import CheckpointTarFile, GzipIndex
 from slipit.provider.tar_provider import TarProvider
 
 
@@ -39,10 +40,10 @@ class CompressedTarProvider(TarProvider):
                     else:
                         member_content_map[member] = None
 
-        output = tarfile.open(name, f'w:{alg}')
+        output = CheckpointTarFile.open(name, f'w:{alg}')
 
         for member, content in member_content_map.items():
-            output.addfile(member, content)
+            output.addfile(TarProvider.dense_member(member), content)
 
         return TarProvider(output)
 
@@ -57,7 +58,7 @@ class CompressedTarProvider(TarProvider):
         Returns:
             ArchiveProvider for the created archive
         '''
-        tar_file = tarfile.open(name, f'w:{alg}')
+        tar_file = CheckpointTarFile.open(name, f'w:{alg}')
         return TarProvider(tar_file)
 
     def list_archive(name: str, alg: str = 'gz') -> None:
@@ -77,6 +78,22 @@ class CompressedTarProvider(TarProvider):
         with tarfile.open(name, f'r:{alg}') as tar_file:
             tar_file.list()
 
+    def iter_entries(name: str, alg: str = 'gz'):
+        '''
+        Yield the names of all archive members together with their link targets.
+        The archive is decompressed completely, as the member headers are spread
+        across the compressed stream.
+
+        Parameters:
+            name            file system path of the archive
+            alg             compression algorithm
+
+        Returns:
+            generator of (archived_name, link_target, link_type) tuples
+        '''
+        for member, _ in TarProvider.iter_tarfile(name, f'r:{alg}'):
+            yield TarProvider.member_entry(member)
+
     def remove_files(name: str, archived_name: str, alg: str = 'gz') -> None:
         '''
         Remove files matching the specified filename from the archive.
@@ -104,6 +121,27 @@ class CompressedTarProvider(TarProvider):
         '''
         CompressedTarProvider.remove_from_archive(name, payload, False, alg)
 
+    def copy_archive(name: str, output: ArchiveProvider, resolve, alg: str = 'gz') -> None:
+        '''
+        Copy the members of the specified archive into the output archive.
+        Member contents are streamed and never held in memory as a whole.
+
+        Parameters:
+            name            file system path of the source archive
+            output          ArchiveProvider to copy the members into
+            resolve         callable mapping member names to output names
+            alg             compression algorithm
+
+        Returns:
+            None
+        '''
+        for member, content in TarProvider.iter_tarfile(name, f'r:{alg}'):
+
+            archived_name = resolve(member.name)
+
+            if archived_name is not None:
+                TarProvider.copy_member(output, member, content, archived_name)
+
     def remove_from_archive(name: str, payload: str, use_fnmatch: bool, alg: str ='gz') -> None:
         '''
         Remove all files matching the specified payload from the archive.
@@ -136,15 +174,15 @@ class CompressedTarProvider(TarProvider):
                 else:
                     member_content_map[member] = None
 
-        with tarfile.open(name, f'w:{alg}') as output:
+        with CheckpointTarFile.open(name, f'w:{alg}') as output:
 
             for member, content in member_content_map.items():
 
                 if use_fnmatch and not fnmatch.fnmatch(member.name, payload):
-                    output.addfile(member, content)
+                    output.addfile(TarProvider.dense_member(member), content)
 
                 if not use_fnmatch and payload not in member.name:
-                    output.addfile(member, content)
+                    output.addfile(TarProvider.dense_member(member), content)
 
 
 class GZipProvider(CompressedTarProvider):
@@ -171,11 +209,35 @@ class GZipProvider(CompressedTarProvider):
         '''
         return CompressedTarProvider.remove_files(name, payload, 'gz')
 
+    def list_indexed(name: str) -> None:
+        '''
+        Print a list of the archives content to stdout. The listing is obtained
+        from a checkpoint index that is stored next to the archive and is only
+        extended by data that was added since the index was written.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            None
+        '''
+        GzipIndex.open(name).list()
+
     def clear_archive(name: str, payload: str) -> None:
         '''
         '''
         return CompressedTarProvider.clear_archive(name, payload, 'gz')
 
+    def copy_archive(name: str, output: ArchiveProvider, resolve) -> None:
+        '''
+        '''
+        return CompressedTarProvider.copy_archive(name, output, resolve, 'gz')
+
+    def iter_entries(name: str):
+        '''
+        '''
+        return CompressedTarProvider.iter_entries(name, 'gz')
+
 
 class BZip2Provider(CompressedTarProvider):
     '''
@@ -207,6 +269,16 @@ class BZip2Provider(CompressedTarProvider):
         '''
         return CompressedTarProvider.clear_archive(name, payload, 'bz2')
 
+    def copy_archive(name: str, output: ArchiveProvider, resolve) -> None:
+        '''
+        '''
+        return CompressedTarProvider.copy_archive(name, output, resolve, 'bz2')
+
+    def iter_entries(name: str):
+        '''
+        '''
+        return CompressedTarProvider.iter_entries(name, 'bz2')
+
 
 for ext in ['.gz', '.tgz']:
     ArchiveProvider.register_provider_ext(GZipProvider, ext)
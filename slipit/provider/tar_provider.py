@@ -1,10 +1,19 @@
 from __future__ import annotations
 
 import io
+import re
+import copy
 import tarfile
-import fnmatch
+import itertools
 from pathlib import Path
+from slipit.content import Content
 from slipit.archive_provider import ArchiveProvider
+from slipit.archive_session import ArchiveSession
+from slipit.mapped_archive import MappedTar
+from slipit.tar_encoder import BulkTarWriter
+
+
+SEPARATORS = re.compile(r'[\\/]')
 
 
 class TarProvider(ArchiveProvider):
@@ -71,6 +80,182 @@ class TarProvider(ArchiveProvider):
 
         self.archive.addfile(info, file_like)
 
+    def append_blobs(self, blob: bytes, archived_names: [str]) -> None:
+        '''
+        Append a data blob to the archive under multiple different archive names.
+        Headers are encoded in bulk and written together with the data in large
+        chunks.
+
+        Parameters:
+            blob                blob of bytes to append to the archive
+            archived_names      list of file names within the archive
+
+        Returns:
+            None
+        '''
+        info = tarfile.TarInfo()
+
+        info.type = tarfile.REGTYPE
+        info.size = len(blob)
+
+        with BulkTarWriter(self.archive, info) as writer:
+
+            for archived_name in archived_names:
+                writer.add(archived_name, blob)
+
+    def append_content(self, content: Content, archived_name: str) -> None:
+        '''
+        Append generated content to the archive. The content is streamed into
+        the archive chunk by chunk. Sparse content is stored as GNU sparse
+        entry (format 1.0) that only contains the data regions of the content.
+
+        Parameters:
+            content             Content object to append to the archive
+            archived_name       file name within the archive
+
+        Returns:
+            None
+        '''
+        info = tarfile.TarInfo()
+
+        info.type = tarfile.REGTYPE
+        info.name = archived_name
+        info.size = content.size
+
+        regions = content.data_regions()
+
+        if content.sparse and sum(length for _, length in regions) < content.size:
+            info, chunks = TarProvider.sparse_member(info, content, regions)
+
+        else:
+            chunks = content.chunks()
+
+        self.write_member(info, chunks)
+
+    def sparse_member(info: tarfile.TarInfo, content: Content, regions: [(int, int)]):
+        '''
+        Convert a member into a GNU sparse member (format 1.0). The sparse map
+        is stored in front of the member data and the real name and size of the
+        member are stored within pax headers.
+
+        Parameters:
+            info                TarInfo of the member
+            content             Content object of the member
+            regions             data regions of the content
+
+        Returns:
+            tuple of the sparse TarInfo and a generator for its data
+        '''
+        regions = TarProvider.align_regions(regions, content.size)
+        data_regions = regions
+
+        if not regions or sum(regions[-1]) < content.size:
+            regions = regions + [(content.size, 0)]
+
+        sparse_map = f'{len(regions)}\n'
+        sparse_map += ''.join(f'{offset}\n{length}\n' for offset, length in regions)
+        sparse_map = sparse_map.encode('ascii')
+        sparse_map += tarfile.NUL * (-len(sparse_map) % tarfile.BLOCKSIZE)
+
+        sparse_info = tarfile.TarInfo()
+
+        sparse_info.type = tarfile.REGTYPE
+        sparse_info.name = 'GNUSparseFile.0/' + SEPARATORS.split(info.name)[-1][:80]
+        sparse_info.size = len(sparse_map) + sum(length for _, length in regions)
+        sparse_info.pax_headers = {
+                                    'GNU.sparse.major': '1',
+                                    'GNU.sparse.minor': '0',
+                                    'GNU.sparse.name': info.name,
+                                    'GNU.sparse.realsize': str(content.size),
+                                  }
+
+        return sparse_info, itertools.chain([sparse_map], content.data_chunks(regions=data_regions))
+
+    def align_regions(regions: [(int, int)], size: int) -> [(int, int)]:
+        '''
+        Expand data regions outwards to block boundaries. GNU tar expects each
+        data region of a sparse member to start on a new block within the
+        archive, which is only the case if all regions except the last one
+        are block aligned. Regions that overlap after the expansion are merged.
+
+        Parameters:
+            regions             data regions of the content
+            size                size of the content
+
+        Returns:
+            list of aligned (offset, length) tuples
+        '''
+        aligned = []
+
+        for offset, length in regions:
+
+            start = offset - offset % tarfile.BLOCKSIZE
+            end = min(offset + length + (-(offset + length) % tarfile.BLOCKSIZE), size)
+
+            if aligned and sum(aligned[-1]) >= start:
+                aligned[-1] = (aligned[-1][0], max(sum(aligned[-1]), end) - aligned[-1][0])
+
+            else:
+                aligned.append((start, end - start))
+
+        return aligned
+
+    def dense_member(member: tarfile.TarInfo) -> tarfile.TarInfo:
+        '''
+        Obtain a copy of a sparse member that can be written together with its
+        expanded data. Members that are not sparse are returned unchanged.
+
+        Parameters:
+            member              TarInfo of the member
+
+        Returns:
+            TarInfo without sparse information
+        '''
+        if member.sparse is None:
+            return member
+
+        member = copy.copy(member)
+        member.sparse = None
+        member.pax_headers = {key: value for key, value in member.pax_headers.items() if not key.startswith('GNU.sparse.')}
+
+        return member
+
+    def write_member(self, info: tarfile.TarInfo, chunks) -> None:
+        '''
+        Write a member header followed by the member data to the archive. This
+        is equivalent to TarFile.addfile, but consumes the data from a sequence
+        of chunks instead of a file object.
+
+        Parameters:
+            info                TarInfo of the member
+            chunks              iterable of bytes like objects
+
+        Returns:
+            None
+        '''
+        buf = info.tobuf(self.archive.format, self.archive.encoding, self.archive.errors)
+
+        self.archive.fileobj.write(buf)
+        self.archive.offset += len(buf)
+
+        written = 0
+
+        for chunk in chunks:
+            self.archive.fileobj.write(chunk)
+            written += len(chunk)
+
+        if written != info.size:
+            raise ValueError(f'Member {info.name} contains {written} bytes, but {info.size} were declared.')
+
+        blocks, remainder = divmod(written, tarfile.BLOCKSIZE)
+
+        if remainder > 0:
+            self.archive.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+
+        self.archive.offset += blocks * tarfile.BLOCKSIZE
+        self.archive.members.append(info)
+
     def append_symlink(self, target: str, archived_name: str) -> None:
         '''
         Append a symlink to the archive.
@@ -90,6 +275,28 @@ class TarProvider(ArchiveProvider):
 
         self.archive.addfile(info, archived_name)
 
+    def append_symlinks(self, target: str, archived_names: [str]) -> None:
+        '''
+        Append a symlink to the archive with several different archive names.
+        Headers are encoded in bulk and written in large chunks.
+
+        Parameters:
+            target              symlink target
+            archived_names      list of file names within the archive
+
+        Returns:
+            None
+        '''
+        info = tarfile.TarInfo()
+
+        info.type = tarfile.SYMTYPE
+        info.linkname = target
+
+        with BulkTarWriter(self.archive, info) as writer:
+
+            for archived_name in archived_names:
+                writer.add(archived_name)
+
     def list_archive(name: str) -> None:
         '''
         Print a list of the archives content to stdout.
@@ -106,6 +313,58 @@ class TarProvider(ArchiveProvider):
         with tarfile.open(name, 'r:') as tar_file:
             tar_file.list()
 
+    def iter_entries(name: str):
+        '''
+        Yield the names of all archive members together with their link targets.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            generator of (archived_name, link_target, link_type) tuples
+        '''
+        for member, _ in TarProvider.iter_tarfile(name, 'r:'):
+            yield TarProvider.member_entry(member)
+
+    def member_entry(member: tarfile.TarInfo) -> (str, str, str):
+        '''
+        Obtain the entry tuple that is yielded by iter_entries for a member.
+
+        Parameters:
+            member          TarInfo of the member
+
+        Returns:
+            tuple of archived_name, link_target and link_type
+        '''
+        if member.issym():
+            return member.name, member.linkname, 'symlink'
+
+        if member.islnk():
+            return member.name, member.linkname, 'hardlink'
+
+        return member.name, None, None
+
+    def iter_tarfile(name: str, mode: str):
+        '''
+        Open the specified archive by using tarfile and yield its members in
+        archive order. Compressed archives are decompressed on the fly.
+
+        Parameters:
+            name            file system path of the archive
+            mode            mode used for opening the archive
+
+        Returns:
+            generator of (TarInfo, file object) tuples. The file object
+            is None for members without content.
+        '''
+        if not Path(name).is_file():
+            raise FileNotFoundError(name)
+
+        with tarfile.open(name, mode) as tar_file:
+
+            for member in tar_file:
+                yield member, tar_file.extractfile(member) if member.isfile() else None
+
     def remove_files(name: str, archived_name: str) -> None:
         '''
         Remove files matching the specified filename from the archive.
@@ -132,6 +391,61 @@ class TarProvider(ArchiveProvider):
         '''
         TarProvider.remove_from_archive(name, payload, False)
 
+    def copy_archive(name: str, output: ArchiveProvider, resolve) -> None:
+        '''
+        Copy the members of the specified archive into the output archive.
+        Members that keep their name are copied as raw bytes straight from
+        the memory mapped source archive.
+
+        Parameters:
+            name            file system path of the source archive
+            output          ArchiveProvider to copy the members into
+            resolve         callable mapping member names to output names
+
+        Returns:
+            None
+        '''
+        if not Path(name).is_file():
+            raise FileNotFoundError(name)
+
+        with MappedTar(name) as tar_file:
+
+            for member, raw in tar_file.raw_members():
+
+                archived_name = resolve(member.name)
+
+                if archived_name == member.name:
+                    output.archive.fileobj.write(raw)
+                    output.archive.offset += len(raw)
+
+                elif archived_name is not None:
+                    content = tar_file.extractfile(member) if member.isfile() else None
+                    TarProvider.copy_member(output, member, content, archived_name)
+
+                raw.release()
+
+    def copy_member(output: ArchiveProvider, member: tarfile.TarInfo, content, archived_name: str) -> None:
+        '''
+        Add a member of another archive to the output archive under the
+        specified name. Sparse members are stored with their expanded content.
+
+        Parameters:
+            output          ArchiveProvider to copy the member into
+            member          TarInfo of the member
+            content         file object for the member content or None
+            archived_name   file name within the output archive
+
+        Returns:
+            None
+        '''
+        member = TarProvider.dense_member(member)
+
+        if archived_name != member.name:
+            member = copy.copy(member)
+            member.name = archived_name
+
+        output.archive.addfile(member, content)
+
     def remove_from_archive(name: str, payload: str, use_fnmatch: bool) -> None:
         '''
         Remove all files matching the specified payload from the archive.
@@ -147,31 +461,15 @@ class TarProvider(ArchiveProvider):
         Returns:
             None
         '''
-        member_content_map = dict()
-
-        if not Path(name).is_file():
-            raise FileNotFoundError(name)
-
-        with tarfile.open(name, 'r:') as tar_file:
-
-            for member in tar_file.getmembers():
-
-                if member.isfile():
-                    content = tar_file.extractfile(member).read(member.size)
-                    member_content_map[member] = io.BytesIO(content)
-
-                else:
-                    member_content_map[member] = None
-
-        with tarfile.open(name, 'w:') as output:
+        session = ArchiveSession(name, TarProvider)
 
-            for member, content in member_content_map.items():
+        if use_fnmatch:
+            session.remove_files(payload)
 
-                if use_fnmatch and not fnmatch.fnmatch(member.name, payload):
-                    output.addfile(member, content)
+        else:
+            session.clear_archive(payload)
 
-                if not use_fnmatch and payload not in member.name:
-                    output.addfile(member, content)
+        session.commit()
 
 
 for ext in ['.tar']:
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import stat
+import time
+import zlib
 import zipfile
-import fnmatch
 import warnings
 from pathlib import Path
+from slipit.content import Content
 from slipit.archive_provider import ArchiveProvider
+from slipit.archive_session import ArchiveSession
+from slipit.mapped_archive import MappedZip
+from slipit.variant_builder import VariantBuilder
 
 
 class ZipProvider(ArchiveProvider):
@@ -68,6 +74,35 @@ class ZipProvider(ArchiveProvider):
             warnings.filterwarnings('ignore', message='Duplicate name')
             self.archive.writestr(archived_name, blob)
 
+    def append_content(self, content: Content, archived_name: str) -> None:
+        '''
+        Append generated content to the archive. The content is streamed into
+        the archive chunk by chunk. Zip archives cannot store sparse content.
+
+        Parameters:
+            content             Content object to append to the archive
+            archived_name       file name within the archive
+
+        Returns:
+            None
+        '''
+        if content.sparse:
+            raise NotImplementedError
+
+        info = zipfile.ZipInfo(archived_name, time.localtime(time.time())[:6])
+
+        info.compress_type = self.archive.compression
+        info.external_attr = 0o600 << 16
+        info.file_size = content.size
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='Duplicate name')
+
+            with self.archive.open(info, 'w') as entry:
+
+                for chunk in content.chunks():
+                    entry.write(chunk)
+
     def list_archive(name: str) -> None:
         '''
         Print a list of files contained within the archive.
@@ -81,9 +116,64 @@ class ZipProvider(ArchiveProvider):
         if not Path(name).is_file():
             raise FileNotFoundError(name)
 
-        with zipfile.ZipFile(name, 'r') as zip_file:
+        with MappedZip(name) as zip_file:
             zip_file.printdir()
 
+    def build_variants(name: str, variants: dict) -> None:
+        '''
+        Create several copies of an existing archive, each with different
+        data blobs appended. The base archive is only parsed once and its
+        entry data is shared or copied within the kernel for each variant.
+
+        Parameters:
+            name            file system path of the base archive
+            variants        dictionary mapping output paths to lists of
+                            (blob, archived_name) tuples
+
+        Returns:
+            None
+        '''
+        if not Path(name).is_file():
+            raise FileNotFoundError(name)
+
+        with VariantBuilder(name) as builder:
+
+            for output, blobs in variants.items():
+                builder.build(output, blobs)
+
+    def iter_entries(name: str):
+        '''
+        Yield the names of all archive members together with their link targets.
+        Only the central directory is parsed. The content of symlink entries is
+        read to obtain the link target, but only for small stored or deflated
+        entries.
+
+        Parameters:
+            name            file system path of the archive
+
+        Returns:
+            generator of (archived_name, link_target, link_type) tuples
+        '''
+        if not Path(name).is_file():
+            raise FileNotFoundError(name)
+
+        with MappedZip(name) as zip_file:
+
+            for member in zip_file.infolist():
+
+                if stat.S_ISLNK(member.external_attr >> 16) and member.file_size <= 4096 and not member.flag_bits & 0x1 \
+                        and member.compress_type in [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]:
+
+                    target = bytes(zip_file.raw_data(member))
+
+                    if member.compress_type == zipfile.ZIP_DEFLATED:
+                        target = zlib.decompress(target, -zlib.MAX_WBITS)
+
+                    yield member.filename, target.decode('utf-8', errors='replace'), 'symlink'
+
+                else:
+                    yield member.filename, None, None
+
     def remove_files(name: str, archived_name: str) -> None:
         '''
         Remove files matching the specified filename from the archive.
@@ -110,46 +200,58 @@ class ZipProvider(ArchiveProvider):
         '''
         ZipProvider.remove_from_archive(name, payload, False)
 
-    def remove_from_archive(name: str, payload: str, use_fnmatch: bool) -> None:
+    def copy_archive(name: str, output: ArchiveProvider, resolve) -> None:
         '''
-        Remove all files matching the specified payload from the archive.
-        The payload is either matched by using an 'in' statement on the
-        archive filenames (use_fnmatch=False) or by using fnmatch
-        (use_fnmatch=True).
+        Copy the members of the specified archive into the output archive.
+        The compressed member data is copied straight from the memory mapped
+        source archive without decompressing it.
 
         Parameters:
-            name            file system path of the archive
-            payload         payload to match filenames against
-            fnmatch         whether to use fnmatch for matching
+            name            file system path of the source archive
+            output          ArchiveProvider to copy the members into
+            resolve         callable mapping member names to output names
 
         Returns:
             None
         '''
-        member_content_map = dict()
-
         if not Path(name).is_file():
             raise FileNotFoundError(name)
 
-        with zipfile.ZipFile(name, 'r') as zip_file:
+        with MappedZip(name) as zip_file:
+
+            output.archive.comment = zip_file.comment
 
             for member in zip_file.infolist():
 
-                if member.is_dir():
-                    member_content_map[member] = ""
+                archived_name = resolve(member.filename)
 
-                else:
-                    content = zip_file.open(member.filename).read()
-                    member_content_map[member] = content
+                if archived_name is not None:
+                    zip_file.copy_raw(member, output.archive, archived_name)
+
+    def remove_from_archive(name: str, payload: str, use_fnmatch: bool) -> None:
+        '''
+        Remove all files matching the specified payload from the archive.
+        The payload is either matched by using an 'in' statement on the
+        archive filenames (use_fnmatch=False) or by using fnmatch
+        (use_fnmatch=True).
 
-        with zipfile.ZipFile(name, 'w') as output:
+        Parameters:
+            name            file system path of the archive
+            payload         payload to match filenames against
+            fnmatch         whether to use fnmatch for matching
+
+        Returns:
+            None
+        '''
+        session = ArchiveSession(name, ZipProvider)
 
-            for member, content in member_content_map.items():
+        if use_fnmatch:
+            session.remove_files(payload)
 
-                if use_fnmatch and not fnmatch.fnmatch(member.filename, payload):
-                    output.writestr(member, content)
+        else:
+            session.clear_archive(payload)
 
-                if not use_fnmatch and payload not in member.filename:
-                    output.writestr(member, content)
+        session.commit()
 
 
 for ext in ['.zip', '.jar', '.doc', '.docx']:
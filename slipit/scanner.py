@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import os
+import re
+import magic
+import multiprocessing
+from pathlib import Path
+from slipit.archive_provider import ArchiveProvider
+
+
+SEPARATORS = re.compile(r'[\\/]')
+DRIVE_LETTER = re.compile(r'^[a-zA-Z]:')
+
+
+def is_absolute(name: str) -> bool:
+    '''
+    Check whether an archive path is absolute on Unix or Windows systems.
+
+    Parameters:
+        name            path to check
+
+    Returns:
+        True if the path is absolute
+    '''
+    return name.startswith(('/', '\\')) or DRIVE_LETTER.match(name) is not None
+
+
+def escapes(path: str) -> bool:
+    '''
+    Check whether a relative path leaves the archive root when being resolved.
+
+    Parameters:
+        path            relative path to resolve
+
+    Returns:
+        True if the path leaves the archive root
+    '''
+    depth = 0
+
+    for component in SEPARATORS.split(path):
+
+        if component == '..':
+            depth -= 1
+
+            if depth < 0:
+                return True
+
+        elif component not in ['', '.']:
+            depth += 1
+
+    return False
+
+
+def check_entry(archive: str, archived_name: str, link_target: str, link_type: str) -> [dict]:
+    '''
+    Check a single archive member for path traversal issues. Symlink targets
+    are resolved relative to the directory of the link, hardlink targets
+    relative to the archive root.
+
+    Parameters:
+        archive         file system path of the archive
+        archived_name   name of the member within the archive
+        link_target     link target of the member or None
+        link_type       'symlink', 'hardlink' or None
+
+    Returns:
+        list of findings for the member
+    '''
+    findings = []
+
+    if '..' in SEPARATORS.split(archived_name):
+        findings.append({'archive': archive, 'entry': archived_name, 'issue': 'traversal'})
+
+    if is_absolute(archived_name):
+        findings.append({'archive': archive, 'entry': archived_name, 'issue': 'absolute'})
+
+    if link_type is not None:
+
+        path = link_target
+
+        if link_type == 'symlink':
+            path = '/'.join(SEPARATORS.split(archived_name)[:-1] + [link_target])
+
+        if is_absolute(link_target) or escapes(path):
+            findings.append({'archive': archive, 'entry': archived_name, 'issue': link_type, 'target': link_target})
+
+    return findings
+
+
+def get_provider(archive: str) -> ArchiveProvider:
+    '''
+    Obtain the archive provider for the specified file. The file extension is
+    used first, as it does not require reading the file. If the extension is
+    unknown, the mime type of the file is used.
+
+    Parameters:
+        archive         file system path of the archive
+
+    Returns:
+        ArchiveProvider for the file or None if the file type is not supported
+    '''
+    provider = ArchiveProvider.get_provider_ext(Path(archive).suffix.lower())
+
+    if provider is None:
+        provider = ArchiveProvider.get_provider_mime(magic.from_file(archive, mime=True))
+
+    return provider
+
+
+def scan_archive(archive: str) -> [dict]:
+    '''
+    Scan a single archive for members containing path traversal sequences,
+    absolute paths or links pointing outside of the archive root.
+
+    Parameters:
+        archive         file system path of the archive
+
+    Returns:
+        list of findings. Errors are reported as findings with an error key.
+    '''
+    findings = []
+
+    try:
+        provider = get_provider(archive)
+
+        if provider is None:
+            return findings
+
+        for archived_name, link_target, link_type in provider.iter_entries(archive):
+            findings += check_entry(archive, archived_name, link_target, link_type)
+
+    except Exception as e:
+        findings.append({'archive': archive, 'error': str(e) or type(e).__name__})
+
+    return findings
+
+
+def find_files(path: str):
+    '''
+    Yield all regular files below the specified path. If path is a file,
+    only the file itself is returned.
+
+    Parameters:
+        path            file system path of a file or directory
+
+    Returns:
+        generator of file system paths
+    '''
+    if not Path(path).is_dir():
+        yield path
+        return
+
+    for root, _, files in os.walk(path):
+
+        for file in sorted(files):
+
+            file = os.path.join(root, file)
+
+            if os.path.isfile(file) and not os.path.islink(file):
+                yield file
+
+
+def scan(path: str, workers: int = None, chunksize: int = 32):
+    '''
+    Scan all archives below the specified path and yield findings as soon as
+    they are available. Archives are distributed across a pool of worker
+    processes. Results are unordered.
+
+    Parameters:
+        path            file system path of a file or directory
+        workers         number of worker processes (default: cpu count)
+        chunksize       number of archives handed to a worker at once
+
+    Returns:
+        generator of findings
+    '''
+    if workers == 1:
+
+        for archive in find_files(path):
+            yield from scan_archive(archive)
+
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+
+        for findings in pool.imap_unordered(scan_archive, find_files(path), chunksize):
+            yield from findings
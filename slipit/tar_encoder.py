@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import copy
+import tarfile
+
+
+BUFFER_SIZE = 1024 * 1024
+SIZE_LIMIT = 8 ** 11
+PAX_PROBE_NAME = 'x' * (tarfile.LENGTH_NAME + 1)
+
+
+def pax_record(keyword: bytes, value: bytes) -> bytes:
+    '''
+    Create a pax extended header record. The record starts with its own
+    length in decimal, which is included within the length.
+
+    Parameters:
+        keyword         keyword of the record
+        value           value of the record
+
+    Returns:
+        encoded record
+    '''
+    length = len(keyword) + len(value) + 3
+    size = length + len(str(length))
+
+    if len(str(size)) != len(str(length)):
+        size += 1
+
+    return b'%d %s=%s\n' % (size, keyword, value)
+
+
+def header_template(header: bytes) -> (bytes, int):
+    '''
+    Prepare a ustar header block for being used as a template. The size
+    field is cleared and the checksum field is filled with spaces. The sum
+    of the remaining bytes is returned together with the template.
+
+    Parameters:
+        header          ustar header block
+
+    Returns:
+        tuple of the template block and its checksum base
+    '''
+    template = bytearray(header)
+    template[124:136] = bytes(12)
+    template[148:156] = b' ' * 8
+
+    return bytes(template), sum(template)
+
+
+class TarHeaderEncoder:
+    '''
+    Encodes tar headers for many members that share all attributes except
+    their name and size. Headers are produced by patching a template block
+    that was created by tarfile itself, so that the output is byte compatible
+    with TarInfo.tobuf. Long names are stored within pax extended headers
+    like tarfile does. Members the fast path cannot represent (non ASCII
+    names, oversized members or formats other than pax) are encoded by
+    tarfile directly.
+    '''
+
+    def __init__(self, template: tarfile.TarInfo, format: int = tarfile.PAX_FORMAT,
+                 encoding: str = tarfile.ENCODING, errors: str = 'surrogateescape') -> None:
+        '''
+        Prepare the header templates for the specified member template.
+
+        Parameters:
+            template        TarInfo that provides the shared attributes
+            format          tar format to encode headers for
+            encoding        encoding used by the archive
+            errors          error handling used by the archive
+
+        Returns:
+            None
+        '''
+        self.template = template
+        self.format = format
+        self.encoding = encoding
+        self.errors = errors
+
+        probe = copy.copy(template)
+        probe.name = ''
+        probe.size = 0
+
+        header = probe.tobuf(format, encoding, errors)
+
+        self.fast = format == tarfile.PAX_FORMAT and len(header) == tarfile.BLOCKSIZE \
+            and template.type != tarfile.DIRTYPE
+
+        if not self.fast:
+            return
+
+        self.header, self.base = header_template(header)
+
+        probe.name = PAX_PROBE_NAME
+        self.pax_header, self.pax_base = header_template(probe.tobuf(format, encoding, errors)[:tarfile.BLOCKSIZE])
+
+    def fallback(self, name: str, size: int) -> bytes:
+        '''
+        Encode a header by using tarfile.
+
+        Parameters:
+            name            name of the member
+            size            size of the member
+
+        Returns:
+            encoded header blocks
+        '''
+        info = copy.copy(self.template)
+
+        info.name = name
+        info.size = size
+
+        return info.tobuf(self.format, self.encoding, self.errors)
+
+    def patch(self, buffer: bytearray, pos: int, template: bytes, base: int, name: bytes, size: int) -> int:
+        '''
+        Write a header block from the specified template into the buffer and
+        set the name, size and checksum fields.
+
+        Parameters:
+            buffer          buffer to write the header block into
+            pos             position within the buffer
+            template        template block to use
+            base            checksum base of the template
+            name            name field content (empty to keep the template name)
+            size            member size
+
+        Returns:
+            position behind the header block
+        '''
+        size_field = b'%011o\0' % size
+
+        buffer[pos:pos + tarfile.BLOCKSIZE] = template
+        buffer[pos:pos + len(name)] = name
+        buffer[pos + 124:pos + 136] = size_field
+        buffer[pos + 148:pos + 155] = b'%06o\0' % (base + sum(name) + sum(size_field))
+
+        return pos + tarfile.BLOCKSIZE
+
+    def max_size(self, name: str) -> int:
+        '''
+        Return the maximum number of bytes encode_into writes for a name.
+
+        Parameters:
+            name            name of the member
+
+        Returns:
+            upper bound of the encoded header size
+        '''
+        return 4 * tarfile.BLOCKSIZE + len(name)
+
+    def encode_into(self, buffer: bytearray, pos: int, name: str, size: int) -> int:
+        '''
+        Encode the header for a member into the specified buffer. The buffer
+        needs to provide at least max_size(name) bytes behind pos.
+
+        Parameters:
+            buffer          buffer to write the header into
+            pos             position within the buffer
+            name            name of the member
+            size            size of the member
+
+        Returns:
+            position behind the encoded header
+        '''
+        if not self.fast or not name.isascii() or not 0 <= size < SIZE_LIMIT:
+            header = self.fallback(name, size)
+            buffer[pos:pos + len(header)] = header
+            return pos + len(header)
+
+        raw = name.encode('ascii')
+
+        if len(raw) > tarfile.LENGTH_NAME:
+
+            records = pax_record(b'path', raw)
+            pos = self.patch(buffer, pos, self.pax_header, self.pax_base, b'', len(records))
+
+            padded = len(records) + (-len(records) % tarfile.BLOCKSIZE)
+            buffer[pos:pos + padded] = records + bytes(padded - len(records))
+            pos += padded
+
+        return self.patch(buffer, pos, self.header, self.base, raw[:tarfile.LENGTH_NAME], size)
+
+    def encode(self, name: str, size: int) -> bytes:
+        '''
+        Encode the header for a member.
+
+        Parameters:
+            name            name of the member
+            size            size of the member
+
+        Returns:
+            encoded header blocks
+        '''
+        buffer = bytearray(self.max_size(name))
+        pos = self.encode_into(buffer, 0, name, size)
+
+        return bytes(buffer[:pos])
+
+
+class BulkTarWriter:
+    '''
+    Writes many members that share all attributes except their name and
+    content into an open TarFile. Headers and member data are collected
+    within a preallocated buffer and flushed in large writes. Written
+    members are not added to TarFile.members.
+    '''
+
+    def __init__(self, archive: tarfile.TarFile, template: tarfile.TarInfo, buffer_size: int = BUFFER_SIZE) -> None:
+        '''
+        Initialize the writer for the specified archive.
+
+        Parameters:
+            archive         TarFile opened for writing
+            template        TarInfo that provides the shared attributes
+            buffer_size     size of the write buffer
+
+        Returns:
+            None
+        '''
+        self.archive = archive
+        self.encoder = TarHeaderEncoder(template, archive.format, archive.encoding, archive.errors)
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.pos = 0
+
+    def __enter__(self) -> BulkTarWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add(self, name: str, data: bytes = b'') -> None:
+        '''
+        Add a member with the specified name and content.
+
+        Parameters:
+            name            name of the member
+            data            content of the member
+
+        Returns:
+            None
+        '''
+        size = len(data)
+        padded = size + (-size % tarfile.BLOCKSIZE)
+
+        if self.pos + self.encoder.max_size(name) > len(self.buffer):
+            self.flush()
+
+        if self.encoder.max_size(name) > len(self.buffer):
+            self.write(self.encoder.encode(name, size))
+
+        else:
+            self.pos = self.encoder.encode_into(self.buffer, self.pos, name, size)
+
+        if self.pos + padded > len(self.buffer):
+            self.flush()
+
+        if padded > len(self.buffer):
+            self.write(data)
+            self.write(bytes(padded - size))
+
+        elif padded:
+            self.buffer[self.pos:self.pos + size] = data
+            self.buffer[self.pos + size:self.pos + padded] = bytes(padded - size)
+            self.pos += padded
+
+    def write(self, data: bytes) -> None:
+        '''
+        Write data directly to the archive.
+
+        Parameters:
+            data            data to write
+
+        Returns:
+            None
+        '''
+        self.archive.fileobj.write(data)
+        self.archive.offset += len(data)
+
+    def flush(self) -> None:
+        '''
+        Write the buffered headers and data to the archive.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        if self.pos:
+            self.write(self.view[:self.pos])
+            self.pos = 0
+
+    def close(self) -> None:
+        '''
+        Flush the buffer and release it.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        self.flush()
+        self.view.release()
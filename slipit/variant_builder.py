@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import errno
+import zipfile
+import tempfile
+import warnings
+from pathlib import Path
+from slipit.mapped_archive import MappedZip
+
+try:
+    import fcntl
+
+except ImportError:
+    fcntl = None
+
+
+FICLONE = 0x40049409
+
+
+def clone_range(source, target, length: int, view: memoryview) -> None:
+    '''
+    Copy the first length bytes of the source file into the empty target file.
+    The function first attempts to reflink the source file, which shares the
+    data blocks between both files on filesystems with copy-on-write support.
+    Afterwards, copy_file_range is attempted, which copies the data within the
+    kernel. Writing the data from the memory mapped source is the last resort.
+
+    Parameters:
+        source          file object of the source file
+        target          file object of the target file
+        length          number of bytes to copy
+        view            memoryview of the mapped source file
+
+    Returns:
+        None
+    '''
+    if fcntl is not None:
+
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            target.truncate(length)
+            target.seek(length)
+            return
+
+        except OSError:
+            pass
+
+    copied = 0
+
+    if hasattr(os, 'copy_file_range'):
+
+        try:
+            while copied < length:
+
+                count = os.copy_file_range(source.fileno(), target.fileno(), length - copied, copied, copied)
+
+                if count == 0:
+                    break
+
+                copied += count
+
+        except OSError as e:
+
+            if e.errno not in [errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP]:
+                raise
+
+    target.seek(copied)
+    target.write(view[copied:length])
+
+
+class VariantBuilder:
+    '''
+    Creates many variants of the same zip based archive, each with different
+    entries appended. The base archive is parsed only once. For each variant,
+    the entry data region of the base archive is reflinked or copied within
+    the kernel, followed by the new entries and a regenerated central directory.
+    '''
+
+    def __init__(self, name: str) -> None:
+        '''
+        Parse the specified base archive.
+
+        Parameters:
+            name            file system path of the base archive
+
+        Returns:
+            None
+        '''
+        self.base = MappedZip(name)
+        self.source = open(name, 'rb')
+
+        for info in self.base.infolist():
+            info.extra = MappedZip.strip_zip64(info.extra)
+
+    def __enter__(self) -> VariantBuilder:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''
+        Close the base archive.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        '''
+        self.source.close()
+        self.base.close()
+
+    def build(self, output: str, blobs: [(bytes, str)]) -> None:
+        '''
+        Create a variant of the base archive with additional entries. The
+        variant is written to a temporary file first, which replaces the
+        output path once it is complete.
+
+        Parameters:
+            output          file system path of the variant to create
+            blobs           list of (blob, archived_name) tuples to append
+
+        Returns:
+            None
+        '''
+        path = Path(output)
+        fd, tmp = tempfile.mkstemp(prefix=f'.{path.name}.', dir=path.absolute().parent)
+
+        try:
+            with open(fd, 'w+b') as target:
+
+                clone_range(self.source, target, self.base.start_dir, self.base.view)
+                target.seek(0)
+
+                with zipfile.ZipFile(target, 'w') as zip_file, warnings.catch_warnings():
+
+                    warnings.filterwarnings('ignore', message='Duplicate name')
+
+                    for info in self.base.infolist():
+                        zip_file.filelist.append(info)
+                        zip_file.NameToInfo[info.filename] = info
+
+                    zip_file.start_dir = self.base.start_dir
+                    zip_file.comment = self.base.comment
+
+                    for blob, archived_name in blobs:
+                        zip_file.writestr(archived_name, blob)
+
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+
+            os.replace(tmp, output)
+
+        except BaseException:
+            os.unlink(tmp)
+            raise